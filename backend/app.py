@@ -1,6 +1,18 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
+from backend import metrics
+from backend.database import async_engine
 from backend.routing import router
+from backend.transportation_lib.transport_errors import VALIDATION_ERRORS
+from backend.workers import (ClientDisconnected, SolveError, SolverBusy, SolveTimeout, resume_jobs,
+                             shutdown_executor)
+
+
+# 499 - код nginx для запроса, закрытого клиентом: ответ никто не прочитает, но он попадет в метрики и журнал
+SOLVE_ERROR_STATUSES = {SolverBusy: 503, SolveTimeout: 504, ClientDisconnected: 499}
+# Некорректная таблица или параметры решения, в том числе найденные процессом-решателем
+SOLVE_ERROR_STATUSES.update(dict.fromkeys((SolveError, *VALIDATION_ERRORS), 422))
 
 
 app = FastAPI()
@@ -20,4 +32,30 @@ app.add_middleware(
     allow_headers=["*"]
 )
 
+app.add_middleware(metrics.MetricsMiddleware)
+
 app.include_router(router)
+app.add_event_handler('startup', resume_jobs)
+app.add_event_handler('shutdown', shutdown_executor)
+
+
+async def dispose_async_engine() -> None:
+    # Соединения aiosqlite держат свои потоки, без закрытия пула процесс не завершается
+    if async_engine is not None:
+        await async_engine.dispose()
+
+
+app.add_event_handler('shutdown', dispose_async_engine)
+
+
+async def solve_error_handler(_request: Request, error: Exception) -> JSONResponse:
+    return JSONResponse({'message': str(error)}, status_code=SOLVE_ERROR_STATUSES[type(error)])
+
+
+for solve_error in SOLVE_ERROR_STATUSES:
+    app.add_exception_handler(solve_error, solve_error_handler)
+
+
+@app.get('/metrics', response_class=PlainTextResponse)
+def get_metrics() -> str:
+    return metrics.render()
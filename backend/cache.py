@@ -0,0 +1,94 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional
+from backend import models, schemas
+from backend.database import SessionLocal
+from backend.transportation_lib.transport_table import TransportTable
+
+
+SOLUTION_CACHE_BYTES = int(os.getenv('SOLUTION_CACHE_BYTES', str(64 * 1024 * 1024)))
+SOLUTION_CACHE_PERSISTENT = os.getenv('SOLUTION_CACHE_PERSISTENT', '0') == '1'
+
+
+def solution_key(table: TransportTable, is_optimal: bool, mode: int, pivot_rule: str='dantzig',
+                 block_size: Optional[int]=None) -> str:
+    plan = f'optimal:{pivot_rule}:{block_size}' if is_optimal else 'basic'
+    return hashlib.sha256(f'{table.fingerprint}:{plan}:{mode}'.encode()).hexdigest()
+
+
+class SolutionCache:
+    def __init__(self, max_bytes: int, persistent: bool = False) -> None:
+        # Решения хранятся сериализованными: размер записи известен заранее, а выданный объект нельзя испортить
+        self.__entries: OrderedDict[str, str] = OrderedDict()
+        self.__max_bytes = max_bytes
+        self.__size = 0
+        self.__persistent = persistent
+        self.__lock = threading.Lock()
+        self.__hits = 0
+        self.__persistent_hits = 0
+        self.__misses = 0
+
+    def get(self, key: str) -> Optional[schemas.Solution]:
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is not None:
+                self.__entries.move_to_end(key)
+                self.__hits += 1
+                return schemas.Solution.model_validate_json(entry)
+
+        if self.__persistent:
+            with SessionLocal() as session:
+                cached = session.get(models.CachedSolution, key)
+                entry = cached.solution if cached else None
+            if entry is not None:
+                self.__store(key, entry)
+                with self.__lock:
+                    self.__persistent_hits += 1
+                return schemas.Solution.model_validate_json(entry)
+
+        with self.__lock:
+            self.__misses += 1
+        return None
+
+    def put(self, key: str, solution: schemas.Solution) -> None:
+        entry = solution.model_dump_json()
+        self.__store(key, entry)
+        if self.__persistent:
+            with SessionLocal() as session:
+                session.merge(models.CachedSolution(key=key, solution=entry))
+                session.commit()
+
+    def clear(self) -> None:
+        with self.__lock:
+            self.__entries.clear()
+            self.__size = 0
+
+    def __store(self, key: str, entry: str) -> None:
+        if len(entry) > self.__max_bytes:
+            return
+        with self.__lock:
+            previous = self.__entries.pop(key, None)
+            if previous is not None:
+                self.__size -= len(previous)
+            self.__entries[key] = entry
+            self.__size += len(entry)
+            while self.__size > self.__max_bytes:
+                _, evicted = self.__entries.popitem(last=False)
+                self.__size -= len(evicted)
+
+    @property
+    def stats(self) -> dict[str, int]:
+        with self.__lock:
+            return {
+                'hits': self.__hits,
+                'persistent_hits': self.__persistent_hits,
+                'misses': self.__misses,
+                'entries': len(self.__entries),
+                'size': self.__size,
+                'max_size': self.__max_bytes,
+            }
+
+
+solutions = SolutionCache(SOLUTION_CACHE_BYTES, SOLUTION_CACHE_PERSISTENT)
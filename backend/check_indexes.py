@@ -0,0 +1,94 @@
+import argparse
+import re
+import sys
+from typing import Any, Optional
+from sqlalchemy import Engine, create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from backend import models, schemas, services
+
+
+# Полный проход по таблице без индекса; обход временных подзапросов и списков IN проверкой не считается
+FULL_SCAN = re.compile(r'^SCAN (\w+)$')
+PLANNED_STATEMENTS = ('SELECT', 'UPDATE', 'DELETE')
+
+
+def run_scenario(session_factory: sessionmaker) -> None:
+    # Сервисы вызываются так же, как из обработчиков: регистрация, создание таблиц в обоих форматах хранения,
+    # сохранение и чтение решений, постраничный список, перерасчет и перевод в матричный формат
+    user_id = services.user_register(session_factory(), schemas.User(username='check', password='check'))
+    services.user_login(session_factory(), schemas.User(username='check', password='check'))
+    table = schemas.TransportTable(id=None, name=None, suppliers=[30, 40, 20], consumers=[20, 30, 30, 20],
+                                   price_matrix=[[2, 3, 2, 4], [3, 2, 5, 1], [4, 3, 2, 6]], user_id=user_id)
+
+    table_ids = []
+    storage = services.TABLE_STORAGE
+    try:
+        for idx, services.TABLE_STORAGE in enumerate(('rows', 'matrix')):
+            table_ids.append(services.create_table(session_factory(), table.model_copy(update={'name': f'check{idx}'})))
+    finally:
+        services.TABLE_STORAGE = storage
+
+    for table_id in table_ids:
+        for is_optimal in (False, True):
+            t, _ = services.load_transport_table(session_factory(), table_id)
+            solution = services.solve_optimal(t, 3) if is_optimal else services.solve_basic(t, 1)
+            services.save_solution(session_factory(), table_id, user_id, solution)
+            services.get_table_last_plan(session_factory(), table_id, user_id, is_optimal)
+        services.get_table(session_factory(), table_id, user_id)
+        t, _ = services.load_transport_table(session_factory(), table_id)
+        basis = services.get_last_basis(session_factory(), table_id)
+        services.solve_changes(t, schemas.TableChanges(suppliers={0: 35}), basis, 3)
+
+    for full in (False, True):
+        services.get_tables(session_factory(), user_id, full=full)
+        services.get_tables(session_factory(), user_id, after=table_ids[0], limit=1, full=full)
+    services.migrate_table_storage(session_factory(), table_ids[0])
+
+
+def create_memory_engine() -> Engine:
+    # Схема создается по моделям в памяти: alembic check следит, чтобы миграции с ними совпадали
+    engine = create_engine('sqlite://', connect_args={'check_same_thread': False}, poolclass=StaticPool)
+    models.Base.metadata.create_all(engine)
+    return engine
+
+
+def collect_plans() -> dict[str, list[str]]:
+    engine = create_memory_engine()
+    statements: dict[str, Any] = {}
+
+    def remember(_conn, _cursor, statement: str, parameters: Any, _context, executemany: bool) -> None:
+        if not executemany and statement.lstrip().upper().startswith(PLANNED_STATEMENTS):
+            statements.setdefault(statement, parameters)
+
+    event.listen(engine, 'before_cursor_execute', remember)
+    run_scenario(sessionmaker(autocommit=False, autoflush=False, bind=engine))
+    event.remove(engine, 'before_cursor_execute', remember)
+
+    plans = {}
+    with engine.connect() as connection:
+        for statement, parameters in statements.items():
+            rows = connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters).all()
+            plans[statement] = [row[-1] for row in rows]
+    return plans
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Проверка планов запросов сервисов через EXPLAIN QUERY PLAN')
+    parser.add_argument('--verbose', action='store_true', help='выводить планы всех запросов')
+    args = parser.parse_args(argv)
+
+    failed = 0
+    for statement, plan in collect_plans().items():
+        scans = [detail for detail in plan if FULL_SCAN.match(detail)]
+        failed += bool(scans)
+        if scans or args.verbose:
+            print(' '.join(statement.split()), file=sys.stderr)
+            for detail in plan:
+                print(f'    {detail}', file=sys.stderr)
+    print(f'Запросов с полным проходом по таблице: {failed}', file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,90 @@
+import argparse
+import sys
+from typing import Any, Callable, Optional
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+from backend import schemas, services
+from backend.check_indexes import create_memory_engine
+from backend.transportation_lib.utils import generate_table
+
+
+# Число запросов не должно зависеть от размера таблицы и формата ее хранения
+QUERY_BUDGETS = {
+    'get_table': 4,
+    'get_table_last_plan': 6,
+    'load_transport_table': 4,
+}
+TABLE_SIZES = ((3, 4), (40, 30))
+
+
+def count_queries(session_factory: sessionmaker, service: Callable[..., Any], *args: Any) -> int:
+    engine = session_factory.kw['bind']
+    counter = 0
+
+    def count(*_args: Any) -> None:
+        nonlocal counter
+        counter += 1
+
+    event.listen(engine, 'before_cursor_execute', count)
+    try:
+        service(session_factory(), *args)
+    finally:
+        event.remove(engine, 'before_cursor_execute', count)
+    return counter
+
+
+def create_solved_table(session_factory: sessionmaker, user_id: int, name: str, suppliers_amount: int,
+                        consumers_amount: int) -> int:
+    # Несбалансированная таблица: при сохранении решений к ней добавляются фиктивные участники
+    suppliers, consumers, price_matrix = generate_table(suppliers_amount, consumers_amount, balanced=False)
+    table_id = services.create_table(session_factory(), schemas.TransportTable(
+        id=None, name=name, suppliers=suppliers, consumers=consumers, price_matrix=price_matrix, user_id=user_id))
+    t, _ = services.load_transport_table(session_factory(), table_id)
+    services.save_solution(session_factory(), table_id, user_id, services.solve_basic(t, 1))
+    t, _ = services.load_transport_table(session_factory(), table_id)
+    services.save_solution(session_factory(), table_id, user_id, services.solve_optimal(t, 3))
+    return table_id
+
+
+def collect_counts() -> list[tuple[str, str, int]]:
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=create_memory_engine())
+    user_id = services.user_register(session_factory(), schemas.User(username='check', password='check'))
+
+    counts = []
+    storage = services.TABLE_STORAGE
+    try:
+        for services.TABLE_STORAGE in ('rows', 'matrix'):
+            for suppliers_amount, consumers_amount in TABLE_SIZES:
+                case = f'{services.TABLE_STORAGE} {suppliers_amount}x{consumers_amount}'
+                table_id = create_solved_table(session_factory, user_id, case, suppliers_amount, consumers_amount)
+                for is_dummy in (False, None):
+                    counts.append(('get_table', f'{case} is_dummy={is_dummy}',
+                                   count_queries(session_factory, services.get_table, table_id, user_id, is_dummy)))
+                counts.append(('load_transport_table', case,
+                               count_queries(session_factory, services.load_transport_table, table_id)))
+                for is_optimal in (False, True):
+                    counts.append(('get_table_last_plan', f'{case} is_optimal={is_optimal}',
+                                   count_queries(session_factory, services.get_table_last_plan, table_id, user_id,
+                                                 is_optimal)))
+    finally:
+        services.TABLE_STORAGE = storage
+    return counts
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Проверка числа SQL-запросов при чтении таблиц и последнего плана')
+    parser.add_argument('--verbose', action='store_true', help='выводить число запросов для всех случаев')
+    args = parser.parse_args(argv)
+
+    failed = 0
+    for service, case, counter in collect_counts():
+        exceeded = counter > QUERY_BUDGETS[service]
+        failed += exceeded
+        if exceeded or args.verbose:
+            print(f'{service} ({case}): {counter} запросов, допустимо {QUERY_BUDGETS[service]}', file=sys.stderr)
+    print(f'Вызовов сверх допустимого числа запросов: {failed}', file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
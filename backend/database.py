@@ -1,17 +1,77 @@
 import os
-from sqlalchemy import create_engine
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-# from app.core.config import DATABASE_URL
+from typing import Any, Callable, TypeVar
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import URL, Engine, create_engine, event, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import declarative_base, sessionmaker
 
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DB_PATH = os.path.join(BASE_DIR, 'database.db')
-engine = create_engine(f'sqlite:///{DB_PATH}', connect_args={"check_same_thread": False})
+DATABASE_URL = os.getenv('DATABASE_URL', f'sqlite:///{DB_PATH}')
+# Асинхронный путь включается отдельным адресом с асинхронным драйвером:
+# postgresql+asyncpg://... или sqlite+aiosqlite:///...
+DATABASE_ASYNC_URL = os.getenv('DATABASE_ASYNC_URL')
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '10'))
+DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', '20'))
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '30'))
+DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', '1800'))
+SQLITE_BUSY_TIMEOUT = float(os.getenv('SQLITE_BUSY_TIMEOUT', '30'))
+
+T = TypeVar('T')
+
+
+def get_url(url: str) -> URL:
+    url = make_url(url)
+    # Адреса без драйвера (postgres://, postgresql://) подключаются через psycopg2 из зависимостей
+    if url.drivername in ('postgres', 'postgresql'):
+        url = url.set(drivername='postgresql+psycopg2')
+    return url
+
+
+def get_engine_options(url: URL) -> dict[str, Any]:
+    pool = {'pool_size': DB_POOL_SIZE, 'max_overflow': DB_MAX_OVERFLOW, 'pool_timeout': DB_POOL_TIMEOUT}
+    if url.get_backend_name() != 'sqlite':
+        # pool_pre_ping отбраковывает соединения, закрытые сервером или балансировщиком во время простоя
+        return pool | {'pool_recycle': DB_POOL_RECYCLE, 'pool_pre_ping': True}
+    if url.database in (None, '', ':memory:'):
+        return {'connect_args': {'check_same_thread': False}}
+    return pool | {'connect_args': {'check_same_thread': False, 'timeout': SQLITE_BUSY_TIMEOUT}}
+
+
+def set_sqlite_pragmas(dbapi_connection: Any, _connection_record: Any) -> None:
+    # WAL разрешает чтение во время записи, а busy_timeout заставляет писателя ждать блокировку
+    # вместо немедленной ошибки database is locked
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA journal_mode=WAL')
+    cursor.execute('PRAGMA synchronous=NORMAL')
+    cursor.execute(f'PRAGMA busy_timeout={int(SQLITE_BUSY_TIMEOUT * 1000)}')
+    cursor.close()
+
+
+def create_db_engine(database_url: str) -> Engine:
+    url = get_url(database_url)
+    db_engine = create_engine(url, **get_engine_options(url))
+    if url.get_backend_name() == 'sqlite':
+        event.listen(db_engine, 'connect', set_sqlite_pragmas)
+    return db_engine
+
+
+def create_async_db_engine(database_url: str) -> AsyncEngine:
+    url = make_url(database_url)
+    db_engine = create_async_engine(url, **get_engine_options(url))
+    if url.get_backend_name() == 'sqlite':
+        event.listen(db_engine.sync_engine, 'connect', set_sqlite_pragmas)
+    return db_engine
+
+
+engine = create_db_engine(DATABASE_URL)
+async_engine = create_async_db_engine(DATABASE_ASYNC_URL) if DATABASE_ASYNC_URL else None
 
 Base = declarative_base()
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False) if async_engine else None
 
 
 def get_db():
@@ -20,3 +80,17 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def run_service(service: Callable[..., T], *args: Any) -> T:
+    with SessionLocal() as db:
+        return service(db, *args)
+
+
+async def run_db(service: Callable[..., T], *args: Any, cpu_bound: bool=False) -> T:
+    # С асинхронным драйвером сервис выполняется в цикле событий и не занимает поток на время ожидания базы.
+    # Без него, а также для запросов с тяжелой обработкой результата, сервис уходит в пул потоков, как раньше
+    if AsyncSessionLocal is None or cpu_bound:
+        return await run_in_threadpool(run_service, service, *args)
+    async with AsyncSessionLocal() as db:
+        return await db.run_sync(service, *args)
@@ -0,0 +1,101 @@
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextvars import ContextVar
+from typing import Any, Callable, Optional
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000)
+
+# Обработчик запроса выполняется в пуле потоков с копией контекста, поэтому размер таблицы передается
+# через общий изменяемый словарь, а не через повторную установку переменной
+request_info: ContextVar[Optional[dict[str, int]]] = ContextVar('request_info', default=None)
+
+lock = threading.Lock()
+latency_buckets: defaultdict[tuple[str, str, str], list[int]] = defaultdict(lambda: [0] * len(LATENCY_BUCKETS))
+latency_sum: defaultdict[tuple[str, str, str], float] = defaultdict(float)
+latency_count: defaultdict[tuple[str, str, str], int] = defaultdict(int)
+phase_seconds: defaultdict[str, float] = defaultdict(float)
+solver_counters: defaultdict[str, int] = defaultdict(int)
+
+
+def size_bucket(cells_amount: Optional[int]) -> str:
+    if cells_amount is None:
+        return 'none'
+    idx = bisect_left(SIZE_BUCKETS, cells_amount)
+    return f'le_{SIZE_BUCKETS[idx]}' if idx < len(SIZE_BUCKETS) else f'gt_{SIZE_BUCKETS[-1]}'
+
+
+def set_table_size(suppliers_amount: int, consumers_amount: int) -> None:
+    info = request_info.get()
+    if info is not None:
+        info['cells'] = suppliers_amount * consumers_amount
+
+
+def observe_request(endpoint: str, method: str, cells_amount: Optional[int], seconds: float) -> None:
+    key = (endpoint, method, size_bucket(cells_amount))
+    with lock:
+        buckets = latency_buckets[key]
+        for idx in range(bisect_left(LATENCY_BUCKETS, seconds), len(LATENCY_BUCKETS)):
+            buckets[idx] += 1
+        latency_sum[key] += seconds
+        latency_count[key] += 1
+
+
+def observe_solver(stats: dict[str, dict[str, float | int]]) -> None:
+    with lock:
+        for phase, seconds in stats['phases'].items():
+            phase_seconds[phase] += seconds
+        for counter, value in stats['counters'].items():
+            solver_counters[counter] += value
+
+
+def render() -> str:
+    lines = [
+        '# HELP http_request_duration_seconds Request latency by endpoint and table size',
+        '# TYPE http_request_duration_seconds histogram',
+    ]
+    with lock:
+        for (endpoint, method, size), buckets in sorted(latency_buckets.items()):
+            labels = f'endpoint="{endpoint}",method="{method}",size="{size}"'
+            for bound, amount in zip(LATENCY_BUCKETS, buckets):
+                lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {amount}')
+            count = latency_count[(endpoint, method, size)]
+            lines.append(f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {count}')
+            lines.append(f'http_request_duration_seconds_sum{{{labels}}} {latency_sum[(endpoint, method, size)]}')
+            lines.append(f'http_request_duration_seconds_count{{{labels}}} {count}')
+
+        lines.append('# HELP solver_phase_seconds_total Time spent in solver phases')
+        lines.append('# TYPE solver_phase_seconds_total counter')
+        for phase, seconds in sorted(phase_seconds.items()):
+            lines.append(f'solver_phase_seconds_total{{phase="{phase}"}} {seconds}')
+
+        lines.append('# HELP solver_events_total Solver iterations, degenerate pivots and table extensions')
+        lines.append('# TYPE solver_events_total counter')
+        for counter, value in sorted(solver_counters.items()):
+            lines.append(f'solver_events_total{{event="{counter}"}} {value}')
+    return '\n'.join(lines) + '\n'
+
+
+class MetricsMiddleware:
+    def __init__(self, app: Callable) -> None:
+        self.app = app
+
+    async def __call__(self, scope: dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        info = {}
+        token = request_info.set(info)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            request_info.reset(token)
+            # Метка берется из шаблона маршрута, чтобы идентификаторы в пути не раздували число рядов
+            route = scope.get('route')
+            endpoint = getattr(route, 'path', None) or 'unmatched'
+            observe_request(endpoint, scope['method'], info.get('cells'), time.perf_counter() - start)
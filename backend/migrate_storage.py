@@ -0,0 +1,26 @@
+import argparse
+import sys
+from typing import Optional
+from backend import models, services
+from backend.database import SessionLocal
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Перевод таблиц из хранения по ячейкам в матричный формат')
+    parser.add_argument('table_ids', nargs='*', type=int, help='идентификаторы таблиц, по умолчанию - все')
+    args = parser.parse_args(argv)
+
+    with SessionLocal() as db:
+        table_ids = args.table_ids or [table_id for table_id, in db.query(models.TransportTable.id)
+                                       .order_by(models.TransportTable.id)]
+    migrated = 0
+    # Каждая таблица переводится в отдельной транзакции: прерванную миграцию можно просто запустить повторно
+    for table_id in table_ids:
+        with SessionLocal() as db:
+            migrated += services.migrate_table_storage(db, table_id)
+    print(f'Переведено таблиц: {migrated} из {len(table_ids)}', file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,18 @@
+# ${message}
+from typing import Optional
+from alembic import op
+import sqlalchemy as sa
+${imports if imports else ""}
+
+revision: str = ${repr(up_revision)}
+down_revision: Optional[str] = ${repr(down_revision)}
+branch_labels: Optional[str] = ${repr(branch_labels)}
+depends_on: Optional[str] = ${repr(depends_on)}
+
+
+def upgrade() -> None:
+    ${upgrades if upgrades else "pass"}
+
+
+def downgrade() -> None:
+    ${downgrades if downgrades else "pass"}
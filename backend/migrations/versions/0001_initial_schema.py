@@ -0,0 +1,100 @@
+# Исходная схема приложения до подключения миграций. Существующую базу достаточно отметить и довести до последней
+# ревизии: alembic stamp 0001 && alembic upgrade head
+from typing import Optional
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '0001'
+down_revision: Optional[str] = None
+branch_labels: Optional[str] = None
+depends_on: Optional[str] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'users',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('username', sa.String(), nullable=False),
+        sa.Column('password', sa.String(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_users_id', 'users', ['id'])
+    op.create_index('ix_users_username', 'users', ['username'], unique=True)
+
+    op.create_table(
+        'transport_tables',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('name'),
+    )
+    op.create_index('ix_transport_tables_id', 'transport_tables', ['id'])
+
+    op.create_table(
+        'participants',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('line_id', sa.Integer(), nullable=False),
+        sa.Column('goods_amount', sa.Float(), nullable=False),
+        sa.Column('epsilon', sa.Integer(), nullable=False),
+        sa.Column('is_supplier', sa.Boolean(), nullable=False),
+        sa.Column('is_dummy', sa.Boolean(), nullable=False),
+        sa.Column('transport_table_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['transport_table_id'], ['transport_tables.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_participants_id', 'participants', ['id'])
+
+    op.create_table(
+        'solutions',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('is_optimal', sa.Boolean(), nullable=False),
+        sa.Column('price', sa.Float(), nullable=False),
+        sa.Column('amount_suppliers', sa.Integer(), nullable=False),
+        sa.Column('amount_consumers', sa.Integer(), nullable=False),
+        sa.Column('table_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['table_id'], ['transport_tables.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_solutions_id', 'solutions', ['id'])
+
+    op.create_table(
+        'roots',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('capacity', sa.Integer(), nullable=True),
+        sa.Column('restriction', sa.String(), nullable=True),
+        sa.Column('price', sa.Integer(), nullable=False),
+        sa.Column('supplier_id', sa.Integer(), nullable=False),
+        sa.Column('consumer_id', sa.Integer(), nullable=False),
+        sa.Column('transport_table_id', sa.Integer(), nullable=False),
+        sa.CheckConstraint('supplier_id != consumer_id', name='check_supplier_consumer_different'),
+        sa.ForeignKeyConstraint(['supplier_id'], ['participants.id']),
+        sa.ForeignKeyConstraint(['consumer_id'], ['participants.id']),
+        sa.ForeignKeyConstraint(['transport_table_id'], ['transport_tables.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_roots_id', 'roots', ['id'])
+
+    op.create_table(
+        'solution_roots',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('amount', sa.Float(), nullable=False),
+        sa.Column('epsilon', sa.Integer(), nullable=True),
+        sa.Column('solution_id', sa.Integer(), nullable=False),
+        sa.Column('root_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['solution_id'], ['solutions.id']),
+        sa.ForeignKeyConstraint(['root_id'], ['roots.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_solution_roots_id', 'solution_roots', ['id'])
+
+
+def downgrade() -> None:
+    op.drop_table('solution_roots')
+    op.drop_table('roots')
+    op.drop_table('solutions')
+    op.drop_table('participants')
+    op.drop_table('transport_tables')
+    op.drop_table('users')
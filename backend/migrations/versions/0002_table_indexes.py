@@ -0,0 +1,28 @@
+# Составные индексы под запросы сервисов и уникальность ячеек и линий таблицы
+from typing import Optional
+from alembic import op
+
+
+revision: str = '0002'
+down_revision: Optional[str] = '0001'
+branch_labels: Optional[str] = None
+depends_on: Optional[str] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_transport_tables_user', 'transport_tables', ['user_id', 'id'])
+    op.create_index('ix_participants_table_line', 'participants', ['transport_table_id', 'is_supplier', 'line_id'],
+                    unique=True)
+    op.create_index('ix_roots_table_cell', 'roots', ['transport_table_id', 'supplier_id', 'consumer_id'], unique=True)
+    op.create_index('ix_solutions_table_plan', 'solutions', ['table_id', 'is_optimal', 'id'])
+    op.create_index('ix_solution_roots_solution', 'solution_roots', ['solution_id'])
+    op.create_index('ix_solution_roots_root', 'solution_roots', ['root_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_solution_roots_root', 'solution_roots')
+    op.drop_index('ix_solution_roots_solution', 'solution_roots')
+    op.drop_index('ix_solutions_table_plan', 'solutions')
+    op.drop_index('ix_roots_table_cell', 'roots')
+    op.drop_index('ix_participants_table_line', 'participants')
+    op.drop_index('ix_transport_tables_user', 'transport_tables')
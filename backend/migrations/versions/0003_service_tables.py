@@ -0,0 +1,57 @@
+# Таблицы фоновых задач, постоянного кэша решений и матричного хранения, которых нет в исходной схеме
+from typing import Optional
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '0003'
+down_revision: Optional[str] = '0002'
+branch_labels: Optional[str] = None
+depends_on: Optional[str] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'solve_jobs',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('mode', sa.Integer(), nullable=False),
+        sa.Column('pivot_rule', sa.String(), nullable=False),
+        sa.Column('block_size', sa.Integer(), nullable=True),
+        sa.Column('table', sa.JSON(), nullable=True),
+        sa.Column('result', sa.JSON(), nullable=True),
+        sa.Column('error', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.Column('table_id', sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(['table_id'], ['transport_tables.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_solve_jobs_id', 'solve_jobs', ['id'])
+    op.create_index('ix_solve_jobs_status', 'solve_jobs', ['status'])
+
+    op.create_table(
+        'cached_solutions',
+        sa.Column('key', sa.String(), nullable=False),
+        sa.Column('solution', sa.String(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('key'),
+    )
+
+    op.create_table(
+        'table_matrices',
+        sa.Column('table_id', sa.Integer(), nullable=False),
+        sa.Column('suppliers', sa.LargeBinary(), nullable=False),
+        sa.Column('consumers', sa.LargeBinary(), nullable=False),
+        sa.Column('prices', sa.LargeBinary(), nullable=False),
+        sa.Column('capacities', sa.LargeBinary(), nullable=True),
+        sa.Column('restrictions', sa.JSON(), nullable=True),
+        sa.ForeignKeyConstraint(['table_id'], ['transport_tables.id']),
+        sa.PrimaryKeyConstraint('table_id'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('table_matrices')
+    op.drop_table('cached_solutions')
+    op.drop_table('solve_jobs')
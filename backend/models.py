@@ -1,9 +1,17 @@
-from typing import Optional, Set
-from sqlalchemy import ForeignKey, CheckConstraint
+from datetime import datetime
+from typing import Any, Optional, Set
+from sqlalchemy import ForeignKey, CheckConstraint, Index, JSON, LargeBinary
 from sqlalchemy.orm import mapped_column, Mapped, relationship
 from backend.database import Base
 
 
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_DONE = 'done'
+JOB_FAILED = 'failed'
+JOB_CANCELLED = 'cancelled'
+
+
 class Root(Base):
     __tablename__ = 'roots'
 
@@ -32,6 +40,8 @@ class Root(Base):
 
     __table_args__ = (
         CheckConstraint('supplier_id != consumer_id', name='check_supplier_consumer_different'),
+        # Ячейка таблицы единственна; индекс обслуживает поиск ячеек по парам участников и выборку по таблице
+        Index('ix_roots_table_cell', 'transport_table_id', 'supplier_id', 'consumer_id', unique=True),
     )
 
 
@@ -58,6 +68,10 @@ class Participant(Base):
         foreign_keys=[Root.consumer_id]
     )
 
+    __table_args__ = (
+        Index('ix_participants_table_line', 'transport_table_id', 'is_supplier', 'line_id', unique=True),
+    )
+
 
 class TransportTable(Base):
     __tablename__ = 'transport_tables'
@@ -70,6 +84,25 @@ class TransportTable(Base):
     participants: Mapped[Set['Participant']] = relationship(back_populates='transport_table')
     roots: Mapped[Set['Root']] = relationship(back_populates='transport_table')
     solutions: Mapped[Set['TableSolution']] = relationship(back_populates='transport_table')
+    matrix: Mapped[Optional['TableMatrix']] = relationship(back_populates='transport_table')
+
+    __table_args__ = (
+        Index('ix_transport_tables_user', 'user_id', 'id'),
+    )
+
+
+class TableMatrix(Base):
+    __tablename__ = 'table_matrices'
+
+    # Объемы, цены и пропускные способности хранятся целиком в формате NPY, ограничения разрежены и хранятся в JSON
+    table_id: Mapped[int] = mapped_column(ForeignKey('transport_tables.id'), primary_key=True)
+    suppliers: Mapped[bytes] = mapped_column(LargeBinary)
+    consumers: Mapped[bytes] = mapped_column(LargeBinary)
+    prices: Mapped[bytes] = mapped_column(LargeBinary)
+    capacities: Mapped[Optional[bytes]] = mapped_column(LargeBinary)
+    restrictions: Mapped[Optional[dict[str, str]]] = mapped_column(JSON)
+
+    transport_table: Mapped['TransportTable'] = relationship(back_populates='matrix')
 
 
 class SolutionRoot(Base):
@@ -86,6 +119,11 @@ class SolutionRoot(Base):
     root_id: Mapped[int] = mapped_column(ForeignKey('roots.id'))
     root: Mapped['Root'] = relationship(back_populates='solution_roots')
 
+    __table_args__ = (
+        Index('ix_solution_roots_solution', 'solution_id'),
+        Index('ix_solution_roots_root', 'root_id'),
+    )
+
 
 class TableSolution(Base):
     __tablename__ = 'solutions'
@@ -101,6 +139,11 @@ class TableSolution(Base):
 
     roots: Mapped[Set['SolutionRoot']] = relationship(back_populates='solution')
 
+    # Последний план таблицы читается обратным проходом по индексу без сортировки
+    __table_args__ = (
+        Index('ix_solutions_table_plan', 'table_id', 'is_optimal', 'id'),
+    )
+
 
 class User(Base):
     __tablename__ = 'users'
@@ -110,3 +153,28 @@ class User(Base):
     password: Mapped[str] = mapped_column()
 
     tables: Mapped[Set['TransportTable']] = relationship(back_populates='user')
+
+
+class SolveJob(Base):
+    __tablename__ = 'solve_jobs'
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True, index=True)
+    status: Mapped[str] = mapped_column(default=JOB_QUEUED, index=True)
+    mode: Mapped[int] = mapped_column(default=1)
+    pivot_rule: Mapped[str] = mapped_column(default='dantzig')
+    block_size: Mapped[Optional[int]] = mapped_column()
+    table: Mapped[Optional[dict[str, Any]]] = mapped_column(JSON)
+    result: Mapped[Optional[dict[str, Any]]] = mapped_column(JSON)
+    error: Mapped[Optional[str]] = mapped_column()
+    created_at: Mapped[datetime] = mapped_column(default=datetime.now)
+    finished_at: Mapped[Optional[datetime]] = mapped_column()
+
+    table_id: Mapped[Optional[int]] = mapped_column(ForeignKey('transport_tables.id'))
+
+
+class CachedSolution(Base):
+    __tablename__ = 'cached_solutions'
+
+    key: Mapped[str] = mapped_column(primary_key=True)
+    solution: Mapped[str] = mapped_column()
+    created_at: Mapped[datetime] = mapped_column(default=datetime.now)
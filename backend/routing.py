@@ -1,19 +1,35 @@
-from typing import Optional
-from fastapi import APIRouter, Depends, status
-from fastapi.responses import JSONResponse
+from typing import Any, Callable, Optional
+from fastapi import APIRouter, Depends, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
-from backend import services
-from backend.database import get_db
-from backend.schemas import TransportTable, Solution, User
+from backend import cache, services, utils, workers
+from backend.database import get_db, run_db
+from backend.schemas import (TransportTable, TablePage, RouteTable, TableChanges, BatchSolveRequest, JobRequest, Job,
+                             PivotRuleName, Solution, User)
 
 
 router = APIRouter(prefix="/tables", tags=["tables"])
 
 
+async def solve_plan(request: Request, t: services.TransportTable, key: str, timeout: Optional[float],
+                     with_stats: bool, render: Optional[str], loading_time: Optional[float],
+                     solve: Callable[..., Solution], *args: Any) -> Solution:
+    # Решение выполняется в пуле процессов, поток обработчиков занят только загрузкой таблицы и отчетом
+    solution, stats = await workers.solve_cached(request, key, solve, t, *args, timeout=timeout)
+    return await run_in_threadpool(services.finish_solution, t, solution, with_stats, render, loading_time, stats)
+
+
 @router.get('/', status_code=status.HTTP_200_OK)
-def get_tables(user_id: int, db: Session = Depends(get_db)) -> list[TransportTable]:
-    return services.get_tables(db, user_id)
+async def get_tables(user_id: int, after: Optional[int]=None, limit: int=services.TABLES_PAGE_SIZE,
+                     full: bool=False) -> TablePage:
+    return await run_db(services.get_tables, user_id, after, limit, full, cpu_bound=full)
+
+
+@router.get('/cache/stats', status_code=status.HTTP_200_OK)
+def get_cache_stats() -> dict[str, int]:
+    return cache.solutions.stats
 
 
 @router.get('/{table_id}', status_code=status.HTTP_200_OK)
@@ -27,23 +43,103 @@ def create_table(table: TransportTable, db: Session = Depends(get_db)) -> int:
 
 
 @router.post('/create_basic_plan/{table_id}', status_code=status.HTTP_200_OK)
-def create_basic_plan(table_id: int, db: Session = Depends(get_db), mode: int=1) -> Solution:
-    return services.create_basic_plan(db, table_id, mode)
+async def create_basic_plan(request: Request, table_id: int, mode: int=1, with_stats: bool=False,
+                            render: Optional[str]=None, timeout: Optional[float]=None) -> Solution:
+    t, loading_time = await run_db(services.load_transport_table, table_id, cpu_bound=True)
+    return await solve_plan(request, t, cache.solution_key(t, False, mode), timeout, with_stats, render, loading_time,
+                            services.solve_basic, mode)
 
 
 @router.post('/create_optimal_plan/{table_id}', status_code=status.HTTP_200_OK)
-def create_optimal_plan(table_id: int, db: Session = Depends(get_db), mode: int=1) -> Solution:
-    return services.create_optimal_plan(db, table_id, mode)
+async def create_optimal_plan(request: Request, table_id: int, mode: int=1, pivot_rule: PivotRuleName='dantzig',
+                              block_size: Optional[int]=None, with_stats: bool=False, render: Optional[str]=None,
+                              timeout: Optional[float]=None) -> Solution:
+    t, loading_time = await run_db(services.load_transport_table, table_id, cpu_bound=True)
+    return await solve_plan(request, t, cache.solution_key(t, True, mode, pivot_rule, block_size), timeout,
+                            with_stats, render, loading_time, services.solve_optimal, mode, pivot_rule, block_size)
+
+
+@router.post('/resolve/{table_id}', status_code=status.HTTP_200_OK)
+async def resolve_optimal_plan(request: Request, table_id: int, changes: TableChanges, mode: int=1,
+                               pivot_rule: PivotRuleName='dantzig', block_size: Optional[int]=None,
+                               with_stats: bool=False, render: Optional[str]=None, timeout: Optional[float]=None
+                               ) -> Solution:
+    t, loading_time = await run_db(services.load_transport_table, table_id, cpu_bound=True)
+    basis = await run_db(services.get_last_basis, table_id)
+    solution, stats = await workers.solve_in_pool(request, services.solve_changes, t, changes, basis, mode,
+                                                  pivot_rule, block_size, timeout=timeout)
+    return await run_in_threadpool(services.finish_solution, t, solution, with_stats, render, loading_time, stats)
 
 
 @router.post('/create_basic_plan', status_code=status.HTTP_200_OK)
-def create_basic_plan_unauthorized(table: TransportTable, mode: int=1) -> Solution:
-    return services.create_basic_plan_unauthorized(table, mode)
+async def create_basic_plan_unauthorized(request: Request, table: TransportTable, mode: int=1,
+                                         with_stats: bool=False, render: Optional[str]=None,
+                                         timeout: Optional[float]=None) -> Solution:
+    t = await run_in_threadpool(utils.get_transport_table_info_unauthorized, table)
+    return await solve_plan(request, t, cache.solution_key(t, False, mode), timeout, with_stats, render, None,
+                            services.solve_basic, mode)
 
 
 @router.post('/create_optimal_plan', status_code=status.HTTP_200_OK)
-def create_optimal_plan_unauthorized(table: TransportTable, mode: int=1) -> Solution:
-    return services.create_optimal_plan_unauthorized(table, mode)
+async def create_optimal_plan_unauthorized(request: Request, table: TransportTable, mode: int=1,
+                                           pivot_rule: PivotRuleName='dantzig', block_size: Optional[int]=None,
+                                           with_stats: bool=False, render: Optional[str]=None,
+                                           timeout: Optional[float]=None) -> Solution:
+    t = await run_in_threadpool(utils.get_transport_table_info_unauthorized, table)
+    return await solve_plan(request, t, cache.solution_key(t, True, mode, pivot_rule, block_size), timeout,
+                            with_stats, render, None, services.solve_optimal, mode, pivot_rule, block_size)
+
+
+@router.post('/create_route_plan', status_code=status.HTTP_200_OK)
+async def create_route_plan_unauthorized(request: Request, table: RouteTable, block_size: Optional[int]=None,
+                                         with_stats: bool=False, render: Optional[str]=None,
+                                         timeout: Optional[float]=None) -> Solution:
+    t = await run_in_threadpool(utils.get_route_table_info_unauthorized, table)
+    solution, stats = await workers.solve_in_pool(request, services.solve_route, t, block_size, timeout=timeout)
+    return await run_in_threadpool(services.finish_solution, t, solution, with_stats, render, None, stats)
+
+
+@router.post('/render', status_code=status.HTTP_200_OK, response_class=PlainTextResponse)
+def render_solution(solution: Solution, fmt: str='text') -> str:
+    return services.render_solution(solution, fmt)
+
+
+@router.post('/batch_solve', status_code=status.HTTP_200_OK)
+def batch_solve(batch: BatchSolveRequest, db: Session = Depends(get_db), mode: int=1,
+                pivot_rule: PivotRuleName='dantzig', block_size: Optional[int]=None) -> StreamingResponse:
+    tables = [(table.id, table) for table in batch.tables] + services.get_batch_tables(db, batch.table_ids)
+    return StreamingResponse(workers.stream_solutions(tables, mode, pivot_rule, block_size),
+                             media_type='application/x-ndjson')
+
+
+@router.post('/jobs', status_code=status.HTTP_201_CREATED)
+def create_job(job_request: JobRequest, db: Session = Depends(get_db)) -> Job:
+    job_id = services.create_job(db, job_request)
+    workers.submit_job(job_id)
+    return services.get_job(db, job_id)
+
+
+@router.get('/jobs/{job_id}', status_code=status.HTTP_200_OK)
+async def get_job(job_id: int) -> Job:
+    job = await run_db(services.get_job, job_id)
+    if job is None:
+        return JSONResponse(
+            {'message': 'Задача не найдена'},
+            status_code=status.HTTP_404_NOT_FOUND
+        )
+    return job
+
+
+@router.post('/jobs/{job_id}/cancel', status_code=status.HTTP_200_OK)
+async def cancel_job(job_id: int) -> Job:
+    job = await run_db(services.cancel_job, job_id)
+    if job is None:
+        return JSONResponse(
+            {'message': 'Задача не найдена'},
+            status_code=status.HTTP_404_NOT_FOUND
+        )
+    workers.cancel_job(job_id)
+    return job
 
 
 @router.post('/save_solution/{table_id}', status_code=status.HTTP_201_CREATED)
@@ -64,9 +160,9 @@ def get_table_last_optimal_plan(table_id: int, user_id: int, db: Session = Depen
 
 
 @router.post('/register', status_code=status.HTTP_201_CREATED)
-def user_register(user: User, db: Session = Depends(get_db)) -> JSONResponse:
+async def user_register(user: User) -> JSONResponse:
     try:
-        user_id = services.user_register(db, user)
+        user_id = await run_db(services.user_register, user)
         return JSONResponse(
             {'message': 'success', 'user_id': user_id},
             status_code=status.HTTP_200_OK
@@ -79,9 +175,9 @@ def user_register(user: User, db: Session = Depends(get_db)) -> JSONResponse:
 
 
 @router.post('/login', status_code=status.HTTP_201_CREATED)
-def user_login(user: User, db: Session = Depends(get_db)) -> JSONResponse:
+async def user_login(user: User) -> JSONResponse:
     try:
-        user_id = services.user_login(db, user)
+        user_id = await run_db(services.user_login, user)
         return JSONResponse(
             {'message': 'success', 'user_id': user_id},
             status_code=status.HTTP_200_OK
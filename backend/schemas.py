@@ -1,5 +1,9 @@
-from typing import Optional
+from typing import Literal, Optional
 from pydantic import BaseModel
+from backend.transportation_lib.pricing import PIVOT_RULES
+
+
+PivotRuleName = Literal[PIVOT_RULES]
 
 
 class TransportTable(BaseModel):
@@ -13,12 +17,76 @@ class TransportTable(BaseModel):
     user_id: Optional[int]
 
 
+class TableSummary(BaseModel):
+    id: int
+    name: Optional[str]
+    suppliers: int
+    consumers: int
+    last_price: Optional[float | int] = None
+    last_is_optimal: Optional[bool] = None
+
+
+class TablePage(BaseModel):
+    items: list[TableSummary | TransportTable]
+    next_cursor: Optional[int] = None
+
+
+class Route(BaseModel):
+    supplier_id: int
+    consumer_id: int
+    price: float | int
+    capacity: Optional[float | int] = None
+
+
+class RouteTable(BaseModel):
+    suppliers: list[float | int]
+    consumers: list[float | int]
+    routes: list[Route]
+
+
+class TableChanges(BaseModel):
+    suppliers: Optional[dict[int, float | int]] = None
+    consumers: Optional[dict[int, float | int]] = None
+    price_matrix: Optional[dict[str, float | int]] = None
+    capacities: Optional[dict[str, float | int]] = None
+
+
 class Solution(BaseModel):
     price: float | int
     is_optimal: bool
     roots: list[dict[str, int | float]]
     suppliers: int
     consumers: int
+    stats: Optional[dict[str, dict[str, float | int]]] = None
+    report: Optional[str] = None
+
+
+class BatchSolveRequest(BaseModel):
+    tables: list[TransportTable] = []
+    table_ids: list[int] = []
+
+
+class BatchSolution(BaseModel):
+    index: int
+    table_id: Optional[int] = None
+    solution: Optional[Solution] = None
+    error: Optional[str] = None
+
+
+class JobRequest(BaseModel):
+    table_id: Optional[int] = None
+    table: Optional[TransportTable] = None
+    mode: int = 1
+    pivot_rule: PivotRuleName = 'dantzig'
+    block_size: Optional[int] = None
+
+
+class Job(BaseModel):
+    id: int
+    status: str
+    table_id: Optional[int] = None
+    result: Optional[Solution] = None
+    error: Optional[str] = None
 
 
 class User(BaseModel):
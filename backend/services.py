@@ -1,58 +1,166 @@
-from typing import Optional
-from sqlalchemy import ColumnElement
-from sqlalchemy.orm import Session, Mapped
-from backend import models, schemas, utils
-
-
-def get_tables(db: Session, user_id: int) -> list[schemas.TransportTable]:
-    tables = []
-    for table_id in db.query(models.TransportTable.id).distinct():
-        table_schema = get_table(db, table_id[0], user_id, is_dummy=False)
-        tables.append(table_schema)
-    return tables
-
-
-def get_table(db: Session, table_id: int | ColumnElement[int], user_id: int, is_dummy: Optional[bool]=False
-              ) -> Optional[schemas.TransportTable]:
+import os
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Callable, Optional
+import numpy as np
+from sqlalchemy import ColumnElement, Row, func, tuple_
+from sqlalchemy.orm import Session, Mapped, joinedload, selectinload
+from backend import cache, metrics, models, schemas, utils
+from backend.transportation_lib import reporting
+from backend.transportation_lib.route_table import RouteTable
+from backend.transportation_lib.transport_table import TransportTable
+
+
+TABLES_PAGE_SIZE = 50
+TABLES_PAGE_LIMIT = 500
+# Пары ячеек в одном запросе по (supplier_id, consumer_id) - с запасом от лимита параметров SQLite
+ROOTS_CHUNK_SIZE = 5000
+# 'rows' - ячейка на строку в roots, 'matrix' - матрицы целиком в table_matrices
+TABLE_STORAGE = os.getenv('TABLE_STORAGE', 'rows')
+
+
+def get_tables(db: Session, user_id: int, after: Optional[int]=None, limit: int=TABLES_PAGE_SIZE,
+               full: bool=False) -> schemas.TablePage:
+    limit = min(max(limit, 1), TABLES_PAGE_LIMIT)
     with db as session:
-        table = session.get(models.TransportTable, table_id)
-        suppliers = session.query(models.Participant.id, models.Participant.goods_amount).filter_by(
-            transport_table_id=table_id, is_supplier=True)
-        consumers = session.query(models.Participant.id, models.Participant.goods_amount).filter_by(
-            transport_table_id=table_id, is_supplier=False)
-
-        if is_dummy is not None:
-            suppliers = suppliers.filter_by(is_dummy=is_dummy).order_by('line_id')
-            consumers = consumers.filter_by(is_dummy=is_dummy).order_by('line_id')
-        roots = session.query(models.Root).filter_by(transport_table_id=table_id).filter(
-            models.Root.supplier_id.in_([s[0] for s in suppliers]),
-            models.Root.consumer_id.in_([c[0] for c in consumers])
-        )
-        price_matrix = [[0 for _ in range(consumers.count())] for _ in range(suppliers.count())]
-        capacities = [[0 for _ in range(consumers.count())] for _ in range(suppliers.count())
-                      ] if list(roots)[0].capacity else []
-        restrictions = {}
-        for root in roots:
-            supplier_id = root.supplier.line_id
-            consumer_id = root.consumer.line_id
-            price_matrix[supplier_id][consumer_id] = root.price
-
-            if root.restriction:
-                restrictions[f'{supplier_id}, {consumer_id}'] = root.restriction
-
-            if root.capacity:
-                capacities[supplier_id][consumer_id] = root.capacity
-        table_scheme = schemas.TransportTable(
+        # Курсор - идентификатор последней таблицы предыдущей страницы; лишняя строка показывает, есть ли следующая
+        query = session.query(models.TransportTable.id, models.TransportTable.name).filter_by(user_id=user_id)
+        if after is not None:
+            query = query.filter(models.TransportTable.id > after)
+        tables = query.order_by(models.TransportTable.id).limit(limit + 1).all()
+        next_cursor = tables[limit - 1].id if len(tables) > limit else None
+        tables = tables[:limit]
+        items = get_full_tables(session, tables, user_id) if full else get_table_summaries(session, tables)
+    return schemas.TablePage(items=items, next_cursor=next_cursor)
+
+
+def get_table_summaries(session: Session, tables: list[Row]) -> list[schemas.TableSummary]:
+    # Размеры и последний план загружаются для всей страницы сразу: число запросов не зависит от числа таблиц
+    table_ids = [table.id for table in tables]
+    sizes = defaultdict(lambda: {True: 0, False: 0})
+    participants_amount = func.count(models.Participant.id)  # pylint: disable=not-callable
+    for table_id, is_supplier, amount in session.query(
+            models.Participant.transport_table_id, models.Participant.is_supplier, participants_amount
+    ).filter(models.Participant.transport_table_id.in_(table_ids), models.Participant.is_dummy.is_(False)).group_by(
+        models.Participant.transport_table_id, models.Participant.is_supplier
+    ):
+        sizes[table_id][is_supplier] = amount
+
+    last_ids = session.query(func.max(models.TableSolution.id)).filter(
+        models.TableSolution.table_id.in_(table_ids)).group_by(models.TableSolution.table_id)
+    last_plans = {plan.table_id: plan for plan in session.query(
+        models.TableSolution.table_id, models.TableSolution.price, models.TableSolution.is_optimal
+    ).filter(models.TableSolution.id.in_(last_ids.scalar_subquery()))}
+
+    summaries = []
+    for table in tables:
+        last_plan = last_plans.get(table.id)
+        summaries.append(schemas.TableSummary(
+            id=table.id,
+            name=table.name,
+            suppliers=sizes[table.id][True],
+            consumers=sizes[table.id][False],
+            last_price=last_plan.price if last_plan else None,
+            last_is_optimal=last_plan.is_optimal if last_plan else None,
+        ))
+    return summaries
+
+
+def get_full_tables(session: Session, tables: list[Row], user_id: int, with_dummies: bool=False
+                    ) -> list[schemas.TransportTable]:
+    # Таблицы читаются тремя запросами: матрицы, участники и ячейки загружаются сразу для всех таблиц
+    table_ids = [table.id for table in tables]
+    matrices = {matrix.table_id: matrix for matrix in session.query(models.TableMatrix).filter(
+        models.TableMatrix.table_id.in_(table_ids))}
+    participants_query = session.query(
+        models.Participant.id, models.Participant.transport_table_id, models.Participant.is_supplier,
+        models.Participant.line_id, models.Participant.goods_amount, models.Participant.is_dummy
+    ).filter(models.Participant.transport_table_id.in_(table_ids))
+    if not with_dummies:
+        participants_query = participants_query.filter(models.Participant.is_dummy.is_(False))
+
+    participants = {}
+    lines = defaultdict(lambda: {True: [], False: []})
+    dummies = defaultdict(list)
+    for participant in participants_query.order_by(models.Participant.line_id):
+        participants[participant.id] = participant.line_id
+        lines[participant.transport_table_id][participant.is_supplier].append(participant.goods_amount)
+        if participant.is_dummy:
+            dummies[participant.transport_table_id].append((participant.goods_amount, participant.is_supplier))
+
+    price_matrices, capacities, restrictions = {}, {}, defaultdict(dict)
+    for table_id in table_ids:
+        shape = len(lines[table_id][True]), len(lines[table_id][False])
+        price_matrices[table_id] = [[0] * shape[1] for _ in range(shape[0])]
+        capacities[table_id] = [[0] * shape[1] for _ in range(shape[0])]
+    has_capacities = set()
+    for root in session.query(
+            models.Root.transport_table_id, models.Root.supplier_id, models.Root.consumer_id, models.Root.price,
+            models.Root.restriction, models.Root.capacity
+    ).filter(models.Root.transport_table_id.in_(table_ids)):
+        if root.supplier_id not in participants or root.consumer_id not in participants:
+            continue
+        supplier_id, consumer_id = participants[root.supplier_id], participants[root.consumer_id]
+        price_matrices[root.transport_table_id][supplier_id][consumer_id] = root.price
+        if root.restriction:
+            restrictions[root.transport_table_id][f'{supplier_id}, {consumer_id}'] = root.restriction
+        if root.capacity:
+            has_capacities.add(root.transport_table_id)
+            capacities[root.transport_table_id][supplier_id][consumer_id] = root.capacity
+
+    return [
+        get_matrix_table(matrices[table.id], table.name, user_id, dummies[table.id]) if table.id in matrices else
+        schemas.TransportTable(
             id=table.id,
             name=table.name,
-            suppliers=[s[1] for s in suppliers],
-            consumers=[c[1] for c in consumers],
-            price_matrix=price_matrix,
-            restrictions=restrictions,
-            capacities=capacities,
+            suppliers=lines[table.id][True],
+            consumers=lines[table.id][False],
+            price_matrix=price_matrices[table.id],
+            restrictions=restrictions[table.id],
+            capacities=capacities[table.id] if table.id in has_capacities else [],
             user_id=user_id,
         )
-    return table_scheme
+        for table in tables
+    ]
+
+
+def get_matrix_table(matrix: models.TableMatrix, name: Optional[str], user_id: int,
+                     dummies: Optional[list[Row]] = None) -> schemas.TransportTable:
+    suppliers = utils.unpack_array(matrix.suppliers).tolist()
+    consumers = utils.unpack_array(matrix.consumers).tolist()
+    matrices = [utils.unpack_array(matrix.prices)]
+    if matrix.capacities is not None:
+        matrices.append(utils.unpack_array(matrix.capacities))
+    if dummies:
+        # Фиктивные участники, добавленные при сохранении решений, дополняют матрицы нулевыми линиями
+        for amount, is_supplier in dummies:
+            (suppliers if is_supplier else consumers).append(amount)
+        matrices = [np.pad(values, ((0, len(suppliers) - values.shape[0]), (0, len(consumers) - values.shape[1])))
+                    for values in matrices]
+
+    return schemas.TransportTable(
+        id=matrix.table_id,
+        name=name,
+        suppliers=suppliers,
+        consumers=consumers,
+        price_matrix=matrices[0].tolist(),
+        restrictions={f'{supplier_id}, {consumer_id}': f'{action}{value}'
+                      for (supplier_id, consumer_id), (action, value) in utils.get_restrictions(
+                          matrix.restrictions).items()},
+        capacities=matrices[1].tolist() if len(matrices) > 1 else [],
+        user_id=user_id,
+    )
+
+
+def get_table(db: Session, table_id: int | ColumnElement[int], user_id: int, is_dummy: Optional[bool]=False
+              ) -> Optional[schemas.TransportTable]:
+    # is_dummy=None - вместе с фиктивными участниками, добавленными при сохранении решений
+    with db as session:
+        tables = session.query(models.TransportTable.id, models.TransportTable.name).filter_by(id=table_id).all()
+        if not tables:
+            return None
+        return get_full_tables(session, tables, user_id, with_dummies=is_dummy is None)[0]
 
 
 def create_table(db: Session, table: schemas.TransportTable) -> int:
@@ -61,64 +169,93 @@ def create_table(db: Session, table: schemas.TransportTable) -> int:
 
         t_table = models.TransportTable(user_id=user.id, name=table.name)
         session.add(t_table)
-        session.commit()
-        session.refresh(t_table)
-
-        suppliers = []
-        for idx, supplier in enumerate(table.suppliers):
-            session_supplier = models.Participant(
-                line_id=idx,
-                goods_amount=supplier,
-                epsilon=0,
-                is_supplier=True,
-                transport_table_id=t_table.id,
-            )
-            suppliers.append(session_supplier)
-        session.add_all(suppliers)
-        session.commit()
-        for supplier in suppliers:
-            session.refresh(supplier)
-
-        consumers = []
-        for idx, consumer in enumerate(table.consumers):
-            session_consumer = models.Participant(
-                line_id=idx,
-                goods_amount=consumer,
-                epsilon=0,
-                is_supplier=False,
-                transport_table_id=t_table.id,
-            )
-            consumers.append(session_consumer)
-        session.add_all(consumers)
-        session.commit()
-        for consumer in consumers:
-            session.refresh(consumer)
-
-        roots = []
-        for row_idx, row in enumerate(table.price_matrix):
-            for col_idx, item in enumerate(row):
-                restriction_key = f'{row_idx},{col_idx}'
-                session_root = models.Root(
-                    capacity=table.capacities[row_idx][col_idx] if table.capacities else None,
-                    restriction=table.restrictions[restriction_key]
-                                if table.restrictions and restriction_key in table.restrictions.keys() else None,
-                    price=item,
-                    supplier_id=suppliers[row_idx].id,
-                    consumer_id=consumers[col_idx].id,
-                    transport_table_id=t_table.id,
-                )
-                roots.append(session_root)
-        session.add_all(roots)
+        session.flush()
+
+        # Все строки вставляются пакетно в одной транзакции, идентификаторы участников читаются одним запросом
+        participants = [
+            {'line_id': idx, 'goods_amount': amount, 'epsilon': 0, 'is_supplier': is_supplier, 'is_dummy': False,
+             'transport_table_id': t_table.id}
+            for is_supplier, amounts in ((True, table.suppliers), (False, table.consumers))
+            for idx, amount in enumerate(amounts)
+        ]
+        utils.bulk_insert(session, models.Participant, participants)
+        if TABLE_STORAGE == 'matrix':
+            session.add(models.TableMatrix(table_id=t_table.id, **utils.get_matrix_columns(table)))
+            session.commit()
+            return t_table.id
+
+        suppliers, consumers = [0] * len(table.suppliers), [0] * len(table.consumers)
+        for participant_id, line_id, is_supplier in session.query(
+                models.Participant.id, models.Participant.line_id, models.Participant.is_supplier
+        ).filter_by(transport_table_id=t_table.id):
+            (suppliers if is_supplier else consumers)[line_id] = participant_id
+
+        restrictions = table.restrictions or {}
+        roots = [
+            {
+                'capacity': table.capacities[row_idx][col_idx] if table.capacities else None,
+                'restriction': restrictions.get(f'{row_idx},{col_idx}'),
+                'price': item,
+                'supplier_id': suppliers[row_idx],
+                'consumer_id': consumers[col_idx],
+                'transport_table_id': t_table.id,
+            }
+            for row_idx, row in enumerate(table.price_matrix)
+            for col_idx, item in enumerate(row)
+        ]
+        utils.bulk_insert(session, models.Root, roots)
         session.commit()
 
         return t_table.id
 
 
-def create_basic_plan(db: Session, table_id: int, mode: int) -> schemas.Solution:
+def migrate_table_storage(db: Session, table_id: int) -> bool:
+    table = db.get(models.TransportTable, table_id)
+    if table is None or table.matrix is not None:
+        return False
+    table_schema = get_table(db, table_id, table.user_id, is_dummy=False)
+
+    with db as session:
+        session.add(models.TableMatrix(table_id=table_id, **utils.get_matrix_columns(table_schema)))
+        # Ячейки, на которые ссылаются сохраненные решения, остаются, остальные заменяются матрицами
+        session.query(models.Root).filter(
+            models.Root.transport_table_id == table_id,
+            models.Root.id.not_in(session.query(models.SolutionRoot.root_id))
+        ).delete(synchronize_session=False)
+        session.commit()
+    return True
+
+
+def load_transport_table(db: Session, table_id: int) -> tuple[TransportTable, float]:
+    start = time.perf_counter()
     table = db.get(models.TransportTable, table_id)
 
     t = utils.get_transport_table_info(db, table)
+    return t, time.perf_counter() - start
+
+
+def finish_solution(t: TransportTable | RouteTable, solution: schemas.Solution, with_stats: bool,
+                    render: Optional[str]=None, loading_time: Optional[float]=None,
+                    stats: Optional[dict[str, dict[str, float | int]]]=None) -> schemas.Solution:
+    # Статистика решения, полученного в отдельном процессе, передается явно: копия таблицы там своя
+    stats = stats if stats is not None else t.stats
+    if loading_time is not None:
+        stats['phases']['db_loading'] = loading_time
+    metrics.set_table_size(t.amount_suppliers, t.amount_consumers)
+    metrics.observe_solver(stats)
+    update = {}
+    if with_stats:
+        update['stats'] = stats
+    if render:
+        update['report'] = render_solution(solution, render)
+    return solution.model_copy(update=update) if update else solution
+
+
+def render_solution(solution: schemas.Solution, fmt: str='text') -> str:
+    return reporting.render_roots(solution.roots, solution.suppliers, solution.consumers, fmt)
+
 
+def solve_basic(t: TransportTable, mode: int) -> schemas.Solution:
     roots, price = t.create_basic_plan(mode)
     return schemas.Solution(
         price=price,
@@ -129,27 +266,36 @@ def create_basic_plan(db: Session, table_id: int, mode: int) -> schemas.Solution
     )
 
 
-def create_basic_plan_unauthorized(table: schemas.TransportTable, mode: int) -> schemas.Solution:
-    t = utils.get_transport_table_info_unauthorized(table)
-    roots, price = t.create_basic_plan(mode)
+def get_optimal_solution(t: TransportTable, mode: int, pivot_rule: str='dantzig',
+                         block_size: Optional[int]=None) -> schemas.Solution:
+    key = cache.solution_key(t, True, mode, pivot_rule, block_size)
+    solution = cache.solutions.get(key)
+    if solution is not None:
+        return solution
+
+    solution = solve_optimal(t, mode, pivot_rule, block_size)
+    cache.solutions.put(key, solution)
+    return solution
+
+
+def solve_optimal(t: TransportTable, mode: int, pivot_rule: str='dantzig', block_size: Optional[int]=None
+                  ) -> schemas.Solution:
+    if t.has_capacities:
+        roots, price = t.solve_capacity_plan()
+    else:
+        t.create_basic_plan(mode)
+        roots, price = t.create_optimal_plan(pivot_rule, block_size)
     return schemas.Solution(
         price=price,
-        is_optimal=False,
+        is_optimal=True,
         roots=roots,
         suppliers=t.amount_suppliers,
         consumers=t.amount_consumers
     )
 
 
-def create_optimal_plan(db: Session, table_id: int, mode: int) -> schemas.Solution:
-    table = db.get(models.TransportTable, table_id)
-
-    t = utils.get_transport_table_info(db, table)
-    if t.has_capacities:
-        roots, price = t.solve_capacity_plan()
-    else:
-        t.create_basic_plan(mode)
-        roots, price = t.create_optimal_plan()
+def solve_route(t: RouteTable, block_size: Optional[int]=None) -> schemas.Solution:
+    roots, price = t.solve(block_size)
     return schemas.Solution(
         price=price,
         is_optimal=True,
@@ -159,13 +305,18 @@ def create_optimal_plan(db: Session, table_id: int, mode: int) -> schemas.Soluti
     )
 
 
-def create_optimal_plan_unauthorized(table: schemas.TransportTable, mode: int) -> schemas.Solution:
-    t = utils.get_transport_table_info_unauthorized(table)
-    if t.has_capacities:
-        roots, price = t.solve_capacity_plan()
-    else:
-        t.create_basic_plan(mode)
-        roots, price = t.create_optimal_plan()
+def get_last_basis(db: Session, table_id: int) -> Optional[list[dict[str, int | float]]]:
+    with db as session:
+        last_plan = session.query(models.TableSolution).filter_by(
+            table_id=table_id, is_optimal=True
+        ).order_by(models.TableSolution.id.desc()).first()
+        return utils.get_root_info(last_plan.roots) if last_plan else None
+
+
+def solve_changes(t: TransportTable, changes: schemas.TableChanges, basis: Optional[list[dict[str, int | float]]],
+                  mode: int, pivot_rule: str='dantzig', block_size: Optional[int]=None) -> schemas.Solution:
+    roots, price = t.resolve(changes.suppliers, changes.consumers, utils.get_cell_changes(changes.price_matrix),
+                             utils.get_cell_changes(changes.capacities), basis, mode, pivot_rule, block_size)
     return schemas.Solution(
         price=price,
         is_optimal=True,
@@ -175,6 +326,106 @@ def create_optimal_plan_unauthorized(table: schemas.TransportTable, mode: int) -
     )
 
 
+def get_batch_tables(db: Session, table_ids: list[int]) -> list[tuple[int, Optional[schemas.TransportTable]]]:
+    tables = []
+    for table_id in table_ids:
+        table = db.get(models.TransportTable, table_id)
+        tables.append((table_id, get_table(db, table_id, table.user_id, is_dummy=False) if table else None))
+    return tables
+
+
+def create_job(db: Session, job_request: schemas.JobRequest) -> int:
+    with db as session:
+        job = models.SolveJob(
+            table_id=job_request.table_id,
+            table=job_request.table.model_dump() if job_request.table else None,
+            mode=job_request.mode,
+            pivot_rule=job_request.pivot_rule,
+            block_size=job_request.block_size,
+        )
+        session.add(job)
+        session.commit()
+        return job.id
+
+
+def get_job(db: Session, job_id: int) -> Optional[schemas.Job]:
+    with db as session:
+        job = session.get(models.SolveJob, job_id)
+        if not job:
+            return None
+        return schemas.Job(
+            id=job.id,
+            status=job.status,
+            table_id=job.table_id,
+            result=job.result,
+            error=job.error,
+        )
+
+
+def cancel_job(db: Session, job_id: int) -> Optional[schemas.Job]:
+    with db as session:
+        job = session.get(models.SolveJob, job_id)
+        if not job:
+            return None
+        if job.status in (models.JOB_QUEUED, models.JOB_RUNNING):
+            job.status = models.JOB_CANCELLED
+            job.finished_at = datetime.now()
+            session.commit()
+    return get_job(db, job_id)
+
+
+def run_job(db: Session, job_id: int, stop_condition: Optional[Callable[[], bool]]=None) -> None:
+    with db as session:
+        job = session.get(models.SolveJob, job_id)
+        if not job or job.status != models.JOB_QUEUED:
+            return
+        job.status = models.JOB_RUNNING
+        session.commit()
+        job_request = schemas.JobRequest(
+            table_id=job.table_id,
+            table=job.table,
+            mode=job.mode,
+            pivot_rule=job.pivot_rule,
+            block_size=job.block_size,
+        )
+
+    result, error = None, None
+    try:
+        if job_request.table is not None:
+            t = utils.get_transport_table_info_unauthorized(job_request.table)
+        elif db.get(models.TransportTable, job_request.table_id):
+            t, _ = load_transport_table(db, job_request.table_id)
+        else:
+            raise LookupError(f'Таблица {job_request.table_id} не найдена')
+        t.stop_condition = stop_condition
+        result = get_optimal_solution(t, job_request.mode, job_request.pivot_rule, job_request.block_size).model_dump()
+    except Exception as exc:  # pylint: disable=broad-exception-caught
+        error = str(exc) or type(exc).__name__
+
+    # Отмененная во время решения задача сохраняет свой статус, результат отбрасывается
+    with db as session:
+        job = session.get(models.SolveJob, job_id)
+        if job.status != models.JOB_RUNNING:
+            return
+        job.status = models.JOB_DONE if error is None else models.JOB_FAILED
+        job.result = result
+        job.error = error
+        job.finished_at = datetime.now()
+        session.commit()
+
+
+def get_unfinished_jobs(db: Session) -> list[int]:
+    # Задачи, прерванные остановкой воркеров, возвращаются в очередь
+    with db as session:
+        jobs = session.query(models.SolveJob).filter(
+            models.SolveJob.status.in_([models.JOB_QUEUED, models.JOB_RUNNING])
+        ).order_by(models.SolveJob.id).all()
+        for job in jobs:
+            job.status = models.JOB_QUEUED
+        session.commit()
+        return [job.id for job in jobs]
+
+
 def save_solution(db: Session, table_id: int, user_id: int, table_solution: schemas.Solution) -> Optional[int]:
     with db as session:
         if not session.get(models.User, user_id):
@@ -188,111 +439,106 @@ def save_solution(db: Session, table_id: int, user_id: int, table_solution: sche
             amount_consumers=table_solution.consumers,
         )
         session.add(solution)
-        session.commit()
-        session.refresh(solution)
-
-        solution_roots = []
+        session.flush()
+
+        # Идентификаторы участников и ячеек загружаются словарями, недостающие строки создаются пакетно,
+        # и все изменения фиксируются одной транзакцией
+        prices = session.query(models.TableMatrix.prices).filter_by(table_id=table_id).scalar()
+        prices = utils.unpack_array(prices) if prices is not None else None
+        participants = get_participant_ids(session, table_id)
+        dummies = {}
         for root in table_solution.roots:
-            supplier_query = session.query(models.Participant).filter_by(
-                transport_table_id=table_id,
-                line_id=root['supplier_id'],
-                is_supplier=True,
-            )
-            consumer_query = session.query(models.Participant).filter_by(
-                transport_table_id=table_id,
-                line_id=root['consumer_id'],
-                is_supplier=False,
-            )
-            if supplier_query.count() == 0:
-                supplier = models.Participant(
-                    line_id=root['supplier_id'],
-                    goods_amount=root['amount'],
-                    epsilon=root['epsilon'],
-                    is_supplier=True,
-                    is_dummy=True,
-                    transport_table_id=table_id,
-                )
-                session.add(supplier)
-                session.commit()
-                session.refresh(supplier)
-                supplier_id = supplier.id
-
-                roots = []
-                for c_id in session.query(models.Participant.id).filter_by(transport_table_id=table_id,
-                                                                              is_supplier=False).distinct():
-                    session_root = models.Root(
-                        capacity=0,
-                        restriction=None,
-                        price=0,
-                        supplier_id=supplier_id,
-                        consumer_id=c_id[0],
-                        transport_table_id=table_id,
-                    )
-                    roots.append(session_root)
-                session.add_all(roots)
-                session.commit()
-
-            else:
-                supplier_id = supplier_query.one().id
-
-            if consumer_query.count() == 0:
-                consumer = models.Participant(
-                    line_id=root['consumer_id'],
-                    goods_amount=root['amount'],
-                    epsilon=root['epsilon'],
-                    is_supplier=False,
-                    is_dummy=True,
-                    transport_table_id=table_id,
-                )
-                session.add(consumer)
-                session.commit()
-                session.refresh(consumer)
-                consumer_id = consumer.id
-
-                roots = []
-                for s_id in session.query(models.Participant.id).filter_by(transport_table_id=table_id,
-                                                                              is_supplier=True).distinct():
-                    session_root = models.Root(
-                        capacity=0,
-                        restriction=None,
-                        price=0,
-                        supplier_id=s_id[0],
-                        consumer_id=consumer_id,
-                        transport_table_id=table_id,
-                    )
-                    roots.append(session_root)
-                session.add_all(roots)
-                session.commit()
-
-            else:
-                consumer_id = consumer_query.one().id
-
-            base_root = session.query(models.Root).filter_by(
-                supplier_id=supplier_id,
-                consumer_id=consumer_id,
-                transport_table_id=table_id
-            ).one()
-
-            solution_root = models.SolutionRoot(
-                amount=root['amount'],
-                epsilon=root['epsilon'],
-                solution_id=solution.id,
-                root=base_root,
-            )
-            solution_roots.append(solution_root)
-
-        session.add_all(solution_roots)
+            for line in ((True, root['supplier_id']), (False, root['consumer_id'])):
+                if line in participants:
+                    continue
+                # Объем фиктивной линии - весь небаланс, то есть сумма ее ячеек: первая из них может быть
+                # нулевой базисной ячейкой вырожденного плана
+                dummy = dummies.setdefault(line, {'line_id': line[1], 'goods_amount': 0, 'epsilon': 0,
+                                                  'is_supplier': line[0], 'is_dummy': True,
+                                                  'transport_table_id': table_id})
+                dummy['goods_amount'] += root['amount']
+                dummy['epsilon'] += root['epsilon']
+        if dummies:
+            utils.bulk_insert(session, models.Participant, list(dummies.values()))
+            participants = get_participant_ids(session, table_id)
+            if prices is None:
+                utils.bulk_insert(session, models.Root, get_dummy_roots(table_id, participants, set(dummies)))
+
+        cells = {(participants[(True, root['supplier_id'])], participants[(False, root['consumer_id'])]):
+                 (root['supplier_id'], root['consumer_id']) for root in table_solution.roots}
+        root_ids = get_root_ids(session, table_id, list(cells))
+        missing = [pair for pair in cells if pair not in root_ids]
+        if missing:
+            # В матричном формате строки roots создаются только для ячеек сохраняемых решений
+            utils.bulk_insert(session, models.Root, [
+                {'price': get_matrix_price(prices, cells[pair]), 'capacity': None, 'restriction': None,
+                 'supplier_id': pair[0], 'consumer_id': pair[1], 'transport_table_id': table_id}
+                for pair in missing
+            ])
+            root_ids.update(get_root_ids(session, table_id, missing))
+
+        utils.bulk_insert(session, models.SolutionRoot, [
+            {
+                'amount': root['amount'],
+                'epsilon': root['epsilon'],
+                'solution_id': solution.id,
+                'root_id': root_ids[(participants[(True, root['supplier_id'])],
+                                     participants[(False, root['consumer_id'])])],
+            }
+            for root in table_solution.roots
+        ])
         session.commit()
         return solution.id
 
 
+def get_participant_ids(session: Session, table_id: int) -> dict[tuple[bool, int], int]:
+    return {(is_supplier, line_id): participant_id for participant_id, is_supplier, line_id in session.query(
+        models.Participant.id, models.Participant.is_supplier, models.Participant.line_id
+    ).filter_by(transport_table_id=table_id)}
+
+
+def get_dummy_roots(table_id: int, participants: dict[tuple[bool, int], int], dummies: set[tuple[bool, int]]
+                    ) -> list[dict[str, Optional[int]]]:
+    # Каждая новая фиктивная линия получает нулевые ячейки со всеми участниками противоположной стороны
+    suppliers = [(line in dummies, participant_id) for line, participant_id in participants.items() if line[0]]
+    consumers = [(line in dummies, participant_id) for line, participant_id in participants.items() if not line[0]]
+    return [
+        {'price': 0, 'capacity': 0, 'restriction': None, 'supplier_id': supplier_id, 'consumer_id': consumer_id,
+         'transport_table_id': table_id}
+        for is_dummy_supplier, supplier_id in suppliers
+        for is_dummy_consumer, consumer_id in consumers
+        if is_dummy_supplier or is_dummy_consumer
+    ]
+
+
+def get_root_ids(session: Session, table_id: int, pairs: list[tuple[int, int]]) -> dict[tuple[int, int], int]:
+    root_ids = {}
+    for start in range(0, len(pairs), ROOTS_CHUNK_SIZE):
+        for root_id, supplier_id, consumer_id in session.query(
+                models.Root.id, models.Root.supplier_id, models.Root.consumer_id
+        ).filter(
+            models.Root.transport_table_id == table_id,
+            tuple_(models.Root.supplier_id, models.Root.consumer_id).in_(pairs[start:start + ROOTS_CHUNK_SIZE])
+        ):
+            root_ids[(supplier_id, consumer_id)] = root_id
+    return root_ids
+
+
+def get_matrix_price(prices: Optional[np.ndarray], cell: tuple[int, int]) -> int | float:
+    if prices is None or cell[0] >= prices.shape[0] or cell[1] >= prices.shape[1]:
+        return 0
+    return prices[cell].item()
+
+
 def get_table_last_plan(db: Session, table_id: int, user_id: int, is_optimal: bool
                         ) -> Optional[dict[str, schemas.Solution | schemas.TransportTable]]:
     with db as session:
-        table_schema = get_table(db, table_id, user_id, is_dummy=None)
-
+        # Ячейки плана вместе с участниками загружаются одним дополнительным запросом, без ленивых обращений
         last_plan = session.query(models.TableSolution).filter_by(
             table_id=table_id, is_optimal=is_optimal
+        ).options(
+            selectinload(models.TableSolution.roots).joinedload(models.SolutionRoot.root).options(
+                joinedload(models.Root.supplier), joinedload(models.Root.consumer))
         ).order_by(models.TableSolution.id.desc()).first()
 
         if not last_plan:
@@ -306,8 +552,9 @@ def get_table_last_plan(db: Session, table_id: int, user_id: int, is_optimal: bo
             consumers=last_plan.amount_consumers
         )
 
+        tables = session.query(models.TransportTable.id, models.TransportTable.name).filter_by(id=table_id).all()
         output_data = {
-            'table': table_schema,
+            'table': get_full_tables(session, tables, user_id, with_dummies=True)[0],
             'solution': last_plan
         }
         return output_data
@@ -0,0 +1,166 @@
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Callable, Optional
+import numpy as np
+from .transport_table import TransportTable
+from .utils import MAIN_ANSWER
+
+SIZES = (10, 50, 100, 200, 500, 1000)
+KINDS = ('balanced', 'unbalanced', 'degenerate', 'capacitated')
+CASES = {
+    'basic_north_west': ('balanced', 'unbalanced', 'degenerate'),
+    'basic_minimum_cost': ('balanced', 'unbalanced', 'degenerate'),
+    'basic_vogel': ('balanced', 'unbalanced', 'degenerate'),
+    'optimal': ('balanced', 'unbalanced', 'degenerate'),
+    'capacity': ('capacitated',),
+}
+METRICS = ('seconds', 'pivots', 'peak_memory')
+# Замеры короче этого порога слишком шумные, чтобы считать их регрессией
+MIN_SECONDS = 0.05
+
+
+def generate_instance(kind: str, size: int, seed: int = MAIN_ANSWER
+                      ) -> tuple[list[int], list[int], list[list[int]], Optional[list[list[int]]]]:
+    rng = np.random.default_rng(seed + size)
+    prices = rng.integers(1, 100, (size, size))
+    if kind == 'degenerate':
+        # Равные запасы и потребности: частичные суммы совпадают на каждом шаге северо-западного угла
+        return [50] * size, [50] * size, prices.tolist(), None
+
+    supply = rng.integers(1, 100, size)
+    demand = rng.permutation(supply)
+    if kind == 'unbalanced':
+        supply = supply + rng.integers(0, 25, size)
+    if kind != 'capacitated':
+        return supply.tolist(), demand.tolist(), prices.tolist(), None
+
+    # Пропускные способности строятся поверх допустимого плана, поэтому задача всегда разрешима
+    flow = np.zeros((size, size), dtype=np.int64)
+    remaining_supply, remaining_demand = supply.copy(), demand.copy()
+    supplier_id = consumer_id = 0
+    while supplier_id < size and consumer_id < size:
+        amount = min(remaining_supply[supplier_id], remaining_demand[consumer_id])
+        flow[supplier_id, consumer_id] = amount
+        remaining_supply[supplier_id] -= amount
+        remaining_demand[consumer_id] -= amount
+        if remaining_supply[supplier_id] == 0:
+            supplier_id += 1
+        else:
+            consumer_id += 1
+    capacities = flow + rng.integers(0, 20, (size, size))
+    return supply.tolist(), demand.tolist(), prices.tolist(), capacities.tolist()
+
+
+def prepare_case(case: str, kind: str, size: int) -> tuple[TransportTable, Callable[[], None]]:
+    supply, demand, prices, capacities = generate_instance(kind, size)
+    table = TransportTable(supply, demand, np.array(prices), capacities=capacities)
+    if case == 'capacity':
+        return table, table.solve_capacity_plan
+    if case == 'optimal':
+        table.create_basic_plan(3)
+        return table, table.create_optimal_plan
+    mode = {'basic_north_west': 1, 'basic_minimum_cost': 2, 'basic_vogel': 3}[case]
+    return table, lambda: table.create_basic_plan(mode)
+
+
+def run_case(case: str, kind: str, size: int, repeat: int) -> dict[str, str | int | float]:
+    seconds = []
+    for _ in range(max(1, repeat)):
+        table, solve = prepare_case(case, kind, size)
+        start = time.perf_counter()
+        solve()
+        seconds.append(time.perf_counter() - start)
+
+    # Память замеряется отдельным прогоном: трассировка выделений искажает время
+    _, solve = prepare_case(case, kind, size)
+    tracemalloc.start()
+    try:
+        solve()
+        peak_memory = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'case': case,
+        'kind': kind,
+        'size': size,
+        'seconds': min(seconds),
+        'pivots': table.iterations,
+        'peak_memory': peak_memory,
+    }
+
+
+def run_benchmark(cases: list[str], kinds: list[str], sizes: list[int], repeat: int = 3
+                  ) -> list[dict[str, str | int | float]]:
+    results = []
+    for case in cases:
+        for kind in CASES[case]:
+            if kind not in kinds:
+                continue
+            for size in sizes:
+                result = run_case(case, kind, size, repeat)
+                print(f"{case:<20} {kind:<12} {size:>5} {result['seconds']:>10.4f}s {result['pivots']:>8}"
+                      f" {result['peak_memory'] / 2 ** 20:>10.2f}MiB", file=sys.stderr)
+                results.append(result)
+    return results
+
+
+def compare_results(results: list[dict[str, str | int | float]], baseline: list[dict[str, str | int | float]],
+                    threshold: float) -> list[str]:
+    regressions = []
+    previous = {(item['case'], item['kind'], item['size']): item for item in baseline}
+    for result in results:
+        base = previous.get((result['case'], result['kind'], result['size']))
+        if base is None:
+            continue
+        for metric in METRICS:
+            if metric == 'seconds' and max(result[metric], base[metric]) < MIN_SECONDS:
+                continue
+            if result[metric] > base[metric] * (1 + threshold):
+                regressions.append(f"{result['case']} {result['kind']} {result['size']}: {metric}"
+                                   f" {base[metric]} -> {result[metric]}")
+    return regressions
+
+
+def environment() -> dict[str, str]:
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'system': platform.system(),
+    }
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Замер времени, числа итераций и пиковой памяти решателя')
+    parser.add_argument('--cases', nargs='+', choices=list(CASES), default=list(CASES))
+    parser.add_argument('--kinds', nargs='+', choices=KINDS, default=list(KINDS))
+    parser.add_argument('--sizes', nargs='+', type=int, default=list(SIZES))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', help='файл для сохранения результатов в JSON')
+    parser.add_argument('--baseline', help='JSON с результатами предыдущего запуска для сравнения')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='допустимое относительное ухудшение каждой метрики')
+    args = parser.parse_args(argv)
+
+    results = run_benchmark(args.cases, args.kinds, args.sizes, args.repeat)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump({'environment': environment(), 'results': results}, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as file:
+            baseline = json.load(file)['results']
+        regressions = compare_results(results, baseline, args.threshold)
+        for regression in regressions:
+            print(f'Регрессия: {regression}', file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
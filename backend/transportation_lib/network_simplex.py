@@ -0,0 +1,198 @@
+from typing import Callable, Optional
+import numpy as np
+import numpy.typing as npt
+from .transport_errors import InvalidCapacityPlan, SolveInterrupted
+from .utils import EPSILON_VAL
+
+STATE_UPPER = -1
+STATE_TREE = 0
+STATE_LOWER = 1
+
+
+class NetworkSimplex:
+    def __init__(self, supply: npt.NDArray[np.float64], demand: npt.NDArray[np.float64],
+                 arc_suppliers: npt.NDArray[np.int64], arc_consumers: npt.NDArray[np.int64],
+                 costs: npt.NDArray[np.float64], capacities: npt.NDArray[np.float64],
+                 block_size: Optional[int] = None) -> None:
+        # Узлы 0..m-1 - поставщики, m..m+n-1 - потребители, m+n - корень с искусственными дугами ко всем узлам.
+        # Дуги 0..k-1 - маршруты от поставщика к потребителю, k+v - искусственная дуга узла v
+        suppliers_amount, consumers_amount = len(supply), len(demand)
+        nodes_amount = suppliers_amount + consumers_amount
+        arcs_amount = len(costs)
+        self.__suppliers_amount = suppliers_amount
+        self.__arcs_amount = arcs_amount
+        self.__root = nodes_amount
+        self.__sources = np.asarray(arc_suppliers, dtype=np.int64)
+        self.__targets = suppliers_amount + np.asarray(arc_consumers, dtype=np.int64)
+        self.__iterations = 0
+
+        artificial_cost = (float(np.max(costs, initial=0)) + 1) * (nodes_amount + 1)
+        self.__cost = np.concatenate((costs, np.full(nodes_amount, artificial_cost)))
+        self.__capacity = np.concatenate((capacities, np.full(nodes_amount, np.inf)))
+        self.__flow = np.concatenate((np.zeros(arcs_amount), supply, demand))
+        self.__state = np.concatenate((np.full(arcs_amount, STATE_LOWER, dtype=np.int8),
+                                       np.full(nodes_amount, STATE_TREE, dtype=np.int8)))
+
+        # Начальное дерево сильно допустимо: поставщики отдают запас в корень, корень покрывает спрос потребителей
+        self.__parent = [self.__root] * nodes_amount + [-1]
+        self.__pred = [arcs_amount + node for node in range(nodes_amount)] + [-1]
+        self.__pred_up = [True] * suppliers_amount + [False] * (consumers_amount + 1)
+        self.__depth = [1] * nodes_amount + [0]
+        self.__children = [set() for _ in range(nodes_amount)] + [set(range(nodes_amount))]
+        self.__potential = np.concatenate((np.full(suppliers_amount, -artificial_cost),
+                                           np.full(consumers_amount, artificial_cost), [0.0]))
+
+        self.__block_size = max(1, block_size or int(np.sqrt(arcs_amount)))
+        self.__start_block = 0
+
+    def __arc_ends(self, arc: int) -> tuple[int, int]:
+        if arc < self.__arcs_amount:
+            return int(self.__sources[arc]), int(self.__targets[arc])
+        node = arc - self.__arcs_amount
+        if node < self.__suppliers_amount:
+            return node, self.__root
+        return self.__root, node
+
+    def __find_entering_arc(self) -> Optional[int]:
+        # Блочный поиск: блоки дуг просматриваются по кругу, из первого блока с нарушением берется худшая дуга
+        blocks_amount = -(-self.__arcs_amount // self.__block_size)
+        for offset in range(blocks_amount):
+            block = (self.__start_block + offset) % blocks_amount
+            start = block * self.__block_size
+            end = min(start + self.__block_size, self.__arcs_amount)
+            violations = self.__state[start:end] * (self.__cost[start:end]
+                                                    + self.__potential[self.__sources[start:end]]
+                                                    - self.__potential[self.__targets[start:end]])
+            block_idx = int(np.argmin(violations))
+            if violations[block_idx] < -EPSILON_VAL:
+                self.__start_block = (block + 1) % blocks_amount
+                return start + block_idx
+        return None
+
+    def __find_join(self, first: int, second: int) -> int:
+        while first != second:
+            if self.__depth[first] >= self.__depth[second]:
+                first = self.__parent[first]
+            else:
+                second = self.__parent[second]
+        return first
+
+    def __find_leaving_arc(self, first: int, second: int, join: int, delta: float) -> tuple[float, int, int, int]:
+        # Из блокирующих дуг выбирается последняя при обходе цикла от общего предка - дерево остается сильно допустимым
+        leaving_node, result, leaving_state = -1, 0, STATE_TREE
+        node = first
+        while node != join:
+            arc = self.__pred[node]
+            if self.__pred_up[node]:
+                residual, state = self.__flow[arc], STATE_LOWER
+            else:
+                residual, state = self.__capacity[arc] - self.__flow[arc], STATE_UPPER
+            if residual < delta:
+                delta, leaving_node, result, leaving_state = residual, node, 1, state
+            node = self.__parent[node]
+
+        node = second
+        while node != join:
+            arc = self.__pred[node]
+            if self.__pred_up[node]:
+                residual, state = self.__capacity[arc] - self.__flow[arc], STATE_UPPER
+            else:
+                residual, state = self.__flow[arc], STATE_LOWER
+            if residual <= delta:
+                delta, leaving_node, result, leaving_state = residual, node, 2, state
+            node = self.__parent[node]
+        return delta, leaving_node, result, leaving_state
+
+    def __update_flow(self, entering_arc: int, join: int, delta: float) -> None:
+        value = int(self.__state[entering_arc]) * delta
+        self.__flow[entering_arc] += value
+        source, target = self.__arc_ends(entering_arc)
+        node = source
+        while node != join:
+            self.__flow[self.__pred[node]] += -value if self.__pred_up[node] else value
+            node = self.__parent[node]
+        node = target
+        while node != join:
+            self.__flow[self.__pred[node]] += value if self.__pred_up[node] else -value
+            node = self.__parent[node]
+
+    def __update_tree(self, entering_arc: int, entering_node: int, outer_node: int, leaving_node: int) -> None:
+        # Поддерево под уходящей дугой перевешивается на входящую дугу с разворотом пути до ее конца
+        node, new_parent = entering_node, outer_node
+        new_arc, new_up = entering_arc, self.__arc_ends(entering_arc)[0] == entering_node
+        while True:
+            old_parent, old_arc, old_up = self.__parent[node], self.__pred[node], self.__pred_up[node]
+            self.__children[old_parent].discard(node)
+            self.__parent[node], self.__pred[node], self.__pred_up[node] = new_parent, new_arc, new_up
+            self.__children[new_parent].add(node)
+            if node == leaving_node:
+                break
+            node, new_parent, new_arc, new_up = old_parent, node, old_arc, not old_up
+
+        cost = self.__cost[entering_arc]
+        new_potential = (self.__potential[outer_node] - cost if self.__pred_up[entering_node]
+                         else self.__potential[outer_node] + cost)
+        shift = new_potential - self.__potential[entering_node]
+        self.__depth[entering_node] = self.__depth[outer_node] + 1
+        stack, subtree = [entering_node], []
+        while stack:
+            node = stack.pop()
+            subtree.append(node)
+            for child in self.__children[node]:
+                self.__depth[child] = self.__depth[node] + 1
+                stack.append(child)
+        self.__potential[subtree] += shift
+
+    def __pivot(self, entering_arc: int) -> None:
+        source, target = self.__arc_ends(entering_arc)
+        first, second = (source, target) if self.__state[entering_arc] == STATE_LOWER else (target, source)
+        join = self.__find_join(first, second)
+        delta, leaving_node, result, leaving_state = self.__find_leaving_arc(first, second, join,
+                                                                              self.__capacity[entering_arc])
+        if delta > 0:
+            self.__update_flow(entering_arc, join, delta)
+
+        if result == 0:
+            self.__state[entering_arc] = -self.__state[entering_arc]
+            return
+
+        leaving_arc = self.__pred[leaving_node]
+        self.__state[leaving_arc] = leaving_state
+        self.__flow[leaving_arc] = 0.0 if leaving_state == STATE_LOWER else self.__capacity[leaving_arc]
+        self.__state[entering_arc] = STATE_TREE
+        entering_node, outer_node = (first, second) if result == 1 else (second, first)
+        self.__update_tree(entering_arc, entering_node, outer_node, leaving_node)
+
+    def reprice(self, costs: npt.NDArray[np.float64]) -> None:
+        # Дерево и потоки остаются допустимыми, пересчитываются только стоимости и потенциалы от корня
+        nodes_amount = self.__root
+        artificial_cost = (float(np.max(costs, initial=0)) + 1) * (nodes_amount + 1)
+        self.__cost = np.concatenate((costs, np.full(nodes_amount, artificial_cost)))
+        self.__potential[self.__root] = 0.0
+        stack = [self.__root]
+        while stack:
+            node = stack.pop()
+            for child in self.__children[node]:
+                cost = self.__cost[self.__pred[child]]
+                self.__potential[child] = (self.__potential[node] - cost if self.__pred_up[child]
+                                           else self.__potential[node] + cost)
+                stack.append(child)
+
+    def solve(self, stop_condition: Optional[Callable[[], bool]] = None) -> npt.NDArray[np.float64]:
+        entering_arc = self.__find_entering_arc()
+        while entering_arc is not None:
+            if stop_condition is not None and stop_condition():
+                raise SolveInterrupted(self.__iterations)
+            self.__pivot(entering_arc)
+            self.__iterations += 1
+            entering_arc = self.__find_entering_arc()
+
+        arcs_amount = self.__arcs_amount
+        unallocated = self.__flow[arcs_amount:arcs_amount + self.__suppliers_amount].sum()
+        if unallocated > EPSILON_VAL:
+            raise InvalidCapacityPlan(float(unallocated))
+        return self.__flow[:arcs_amount].copy()
+
+    @property
+    def iterations(self) -> int:
+        return self.__iterations
@@ -0,0 +1,90 @@
+from typing import Optional
+import numpy as np
+import numpy.typing as npt
+from .transport_errors import InvalidPivotRule
+from .utils import EPSILON_VAL
+
+PIVOT_RULES = ('dantzig', 'first', 'block', 'candidates')
+
+
+def reduced_costs(prices: npt.NDArray[np.float64], supplier_values: npt.NDArray[np.float64],
+                  consumer_values: npt.NDArray[np.float64]) -> npt.NDArray[np.float64]:
+    return prices - (consumer_values[None, :] - supplier_values[:, None])
+
+
+class PivotRule:
+    def __init__(self, prices: npt.NDArray[np.float64], rule: str = 'dantzig',
+                 block_size: Optional[int] = None) -> None:
+        if rule not in PIVOT_RULES:
+            raise InvalidPivotRule(rule, PIVOT_RULES)
+        self.__prices = prices
+        self.__rule = rule
+        suppliers_amount, consumers_amount = prices.shape
+        # Размер блока и списка кандидатов задается в ячейках, по умолчанию - корень из размера матрицы
+        self.__block_size = max(1, block_size or int(np.sqrt(suppliers_amount * consumers_amount)))
+        self.__block_rows = max(1, self.__block_size // consumers_amount)
+        self.__start_row = 0
+        self.__candidates = np.empty(0, dtype=np.int64)
+
+    def select(self, supplier_values: npt.NDArray[np.float64], consumer_values: npt.NDArray[np.float64],
+               basic: npt.NDArray[np.bool_]) -> Optional[tuple[int, int]]:
+        if self.__rule == 'first':
+            return self.__select_block(supplier_values, consumer_values, basic, 1, first=True)
+        if self.__rule == 'block':
+            return self.__select_block(supplier_values, consumer_values, basic, self.__block_rows)
+        if self.__rule == 'candidates':
+            return self.__select_candidate(supplier_values, consumer_values, basic)
+
+        costs = np.where(basic, 0, reduced_costs(self.__prices, supplier_values, consumer_values))
+        flat_idx = int(np.argmin(costs))
+        if costs.flat[flat_idx] >= -EPSILON_VAL:
+            return None
+        return self.__unravel(flat_idx)
+
+    def __select_block(self, supplier_values: npt.NDArray[np.float64], consumer_values: npt.NDArray[np.float64],
+                       basic: npt.NDArray[np.bool_], block_rows: int, first: bool = False
+                       ) -> Optional[tuple[int, int]]:
+        suppliers_amount = self.__prices.shape[0]
+        # Блоки строк просматриваются по кругу, начиная с места, где остановился предыдущий поиск
+        for offset in range(0, suppliers_amount, block_rows):
+            rows_amount = min(block_rows, suppliers_amount - offset)
+            rows = (self.__start_row + offset + np.arange(rows_amount)) % suppliers_amount
+            costs = self.__prices[rows] - (consumer_values[None, :] - supplier_values[rows, None])
+            costs[basic[rows]] = 0
+            improving = costs < -EPSILON_VAL
+            if not improving.any():
+                continue
+            block_idx = int(np.argmax(improving)) if first else int(np.argmin(costs))
+            row, consumer_idx = divmod(block_idx, self.__prices.shape[1])
+            self.__start_row = int(rows[row]) if first else int(rows[-1] + 1) % suppliers_amount
+            return int(rows[row]), consumer_idx
+        return None
+
+    def __select_candidate(self, supplier_values: npt.NDArray[np.float64], consumer_values: npt.NDArray[np.float64],
+                           basic: npt.NDArray[np.bool_]) -> Optional[tuple[int, int]]:
+        if self.__candidates.size:
+            supplier_ids, consumer_ids = np.divmod(self.__candidates, self.__prices.shape[1])
+            costs = self.__prices.flat[self.__candidates] - (consumer_values[consumer_ids]
+                                                             - supplier_values[supplier_ids])
+            costs[basic.flat[self.__candidates]] = 0
+            improving = costs < -EPSILON_VAL
+            self.__candidates, costs = self.__candidates[improving], costs[improving]
+
+        # Список кандидатов исчерпан - полный пересчет и отбор наиболее отрицательных оценок
+        if not self.__candidates.size:
+            costs = np.where(basic, 0, reduced_costs(self.__prices, supplier_values, consumer_values)).ravel()
+            improving = np.flatnonzero(costs < -EPSILON_VAL)
+            if not improving.size:
+                return None
+            if improving.size > self.__block_size:
+                improving = improving[np.argpartition(costs[improving], self.__block_size - 1)[:self.__block_size]]
+            self.__candidates, costs = improving, costs[improving]
+
+        best = int(np.argmin(costs))
+        flat_idx = int(self.__candidates[best])
+        self.__candidates = np.delete(self.__candidates, best)
+        return self.__unravel(flat_idx)
+
+    def __unravel(self, flat_idx: int) -> tuple[int, int]:
+        supplier_idx, consumer_idx = divmod(flat_idx, self.__prices.shape[1])
+        return supplier_idx, consumer_idx
@@ -0,0 +1,71 @@
+import html
+import numpy as np
+import numpy.typing as npt
+from prettytable import PrettyTable
+from .transport_errors import InvalidRenderFormat
+from .utils import M_VAL
+
+RENDER_FORMATS = ('text', 'markdown', 'html')
+
+
+def format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else str(value)
+
+
+def plan_rows(amounts: npt.NDArray[np.float64], filled: npt.NDArray[np.bool_], supply: npt.NDArray[np.float64],
+              demand: npt.NDArray[np.float64]) -> tuple[list[str], list[list[str]]]:
+    header = [''] + [f'T{i + 1}' for i in range(len(demand))] + ['A']
+    cells = np.where(filled, amounts, 0.0).tolist()
+    rows = [[f'S{i + 1}'] + [format_value(value) for value in row] + [format_value(supply[i])]
+            for i, row in enumerate(cells)]
+    rows.append(['B'] + [format_value(value) for value in demand.tolist()] + [''])
+    return header, rows
+
+
+def price_rows(prices: npt.NDArray[np.float64], supply: npt.NDArray[np.float64], demand: npt.NDArray[np.float64]
+               ) -> tuple[list[str], list[list[str]]]:
+    header = [''] + [f'T{i + 1}' for i in range(len(demand))] + ['A']
+    rows = [[f'S{i + 1}'] + ['M' if price == M_VAL else format_value(price) for price in row] +
+            [format_value(supply[i])] for i, row in enumerate(prices.tolist())]
+    rows.append(['B'] + [format_value(value) for value in demand.tolist()] + [''])
+    return header, rows
+
+
+def render_text(header: list[str], rows: list[list[str]]) -> str:
+    table = PrettyTable(header)
+    table.add_rows(rows)
+    return table.get_string()
+
+
+def render_markdown(header: list[str], rows: list[list[str]]) -> str:
+    lines = ['| ' + ' | '.join(header) + ' |', '|' + '---|' * len(header)]
+    lines.extend('| ' + ' | '.join(row) + ' |' for row in rows)
+    return '\n'.join(lines)
+
+
+def render_html(header: list[str], rows: list[list[str]]) -> str:
+    lines = ['<table>', '<tr>' + ''.join(f'<th>{html.escape(cell)}</th>' for cell in header) + '</tr>']
+    lines.extend('<tr>' + ''.join(f'<td>{html.escape(cell)}</td>' for cell in row) + '</tr>' for row in rows)
+    lines.append('</table>')
+    return '\n'.join(lines)
+
+
+def render(header: list[str], rows: list[list[str]], fmt: str = 'text') -> str:
+    if fmt == 'text':
+        return render_text(header, rows)
+    if fmt == 'markdown':
+        return render_markdown(header, rows)
+    if fmt == 'html':
+        return render_html(header, rows)
+    raise InvalidRenderFormat(fmt, RENDER_FORMATS)
+
+
+def render_roots(roots: list[dict[str, int | float]], suppliers_amount: int, consumers_amount: int,
+                 fmt: str = 'text') -> str:
+    # Объемы участников восстанавливаются суммами по строкам и столбцам: план сбалансирован
+    amounts = np.zeros((suppliers_amount, consumers_amount))
+    filled = np.zeros((suppliers_amount, consumers_amount), dtype=bool)
+    for root in roots:
+        amounts[root['supplier_id'], root['consumer_id']] += root['amount']
+        filled[root['supplier_id'], root['consumer_id']] = True
+    return render(*plan_rows(amounts, filled, amounts.sum(axis=1), amounts.sum(axis=0)), fmt)
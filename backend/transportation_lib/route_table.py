@@ -0,0 +1,129 @@
+import time
+from typing import Callable, Optional
+import numpy as np
+import numpy.typing as npt
+from .network_simplex import NetworkSimplex
+from .stats import SolverStats
+from .transport_errors import InvalidAmountGood, InvalidPriceValueError, InvalidRouteIndices, InvalidRouteCapacity
+
+
+class RouteTable:
+    def __init__(self, suppliers: list[float | int], consumers: list[float | int],
+                 routes: list[tuple[int, int, float | int] | tuple[int, int, float | int, Optional[float | int]]]
+                 ) -> None:
+        start = time.perf_counter()
+        self.__stats = SolverStats()
+        # Таблица задается только существующими маршрутами (поставщик, потребитель, стоимость[, пропускная
+        # способность]), плотная матрица стоимостей не строится
+        self.__supply = np.array(suppliers, dtype=np.float64).reshape(-1)
+        self.__demand = np.array(consumers, dtype=np.float64).reshape(-1)
+        self.__suppliers_amount = len(self.__supply)
+        self.__consumers_amount = len(self.__demand)
+
+        routes_amount = len(routes)
+        self.__arc_suppliers = np.empty(routes_amount, dtype=np.int64)
+        self.__arc_consumers = np.empty(routes_amount, dtype=np.int64)
+        self.__prices = np.empty(routes_amount, dtype=np.float64)
+        self.__capacities = np.full(routes_amount, np.inf)
+        for idx, route in enumerate(routes):
+            self.__arc_suppliers[idx], self.__arc_consumers[idx], self.__prices[idx] = route[:3]
+            if len(route) > 3 and route[3] is not None:
+                self.__capacities[idx] = route[3]
+
+        self.__validate_table()
+        self.__flows = np.zeros(routes_amount)
+        self.__plan_shape = (self.__suppliers_amount, self.__consumers_amount)
+        self.__stop_condition = None
+        self.__stats.add_phase('construction', time.perf_counter() - start)
+
+    def __validate_table(self) -> None:
+        for supplier_id in np.flatnonzero(~(self.__supply > 0)):
+            raise InvalidAmountGood(self.__supply[supplier_id], 0, supplier_id)
+
+        for consumer_id in np.flatnonzero(~(self.__demand > 0)):
+            raise InvalidAmountGood(self.__demand[consumer_id], 1, consumer_id)
+
+        invalid_routes = ((self.__arc_suppliers < 0) | (self.__arc_suppliers >= self.__suppliers_amount) |
+                          (self.__arc_consumers < 0) | (self.__arc_consumers >= self.__consumers_amount))
+        for idx in np.flatnonzero(invalid_routes):
+            raise InvalidRouteIndices((int(self.__arc_suppliers[idx]), int(self.__arc_consumers[idx])),
+                                      (self.__suppliers_amount, self.__consumers_amount))
+
+        for idx in np.flatnonzero(~(self.__prices >= 0)):
+            raise InvalidPriceValueError(self.__prices[idx],
+                                         (int(self.__arc_suppliers[idx]) + 1, int(self.__arc_consumers[idx]) + 1))
+
+        for idx in np.flatnonzero(~(self.__capacities >= 0)):
+            raise InvalidRouteCapacity(self.__capacities[idx],
+                                       (int(self.__arc_suppliers[idx]) + 1, int(self.__arc_consumers[idx]) + 1))
+
+    def __balanced_network(self) -> tuple[npt.NDArray[np.float64], npt.NDArray[np.float64], npt.NDArray[np.int64],
+                                          npt.NDArray[np.int64], npt.NDArray[np.float64], npt.NDArray[np.float64]]:
+        # Фиктивный участник соединяется нулевыми маршрутами только с противоположной стороной: m или n дуг
+        supply, demand = self.__supply, self.__demand
+        arc_suppliers, arc_consumers = self.__arc_suppliers, self.__arc_consumers
+        prices, capacities = self.__prices, self.__capacities
+        difference = supply.sum() - demand.sum()
+        if difference > 0:
+            demand = np.append(demand, difference)
+            arc_suppliers = np.concatenate((arc_suppliers, np.arange(self.__suppliers_amount)))
+            arc_consumers = np.concatenate((arc_consumers, np.full(self.__suppliers_amount, self.__consumers_amount)))
+            dummy_amount = self.__suppliers_amount
+        elif difference < 0:
+            supply = np.append(supply, -difference)
+            arc_suppliers = np.concatenate((arc_suppliers, np.full(self.__consumers_amount, self.__suppliers_amount)))
+            arc_consumers = np.concatenate((arc_consumers, np.arange(self.__consumers_amount)))
+            dummy_amount = self.__consumers_amount
+        else:
+            dummy_amount = 0
+        prices = np.concatenate((prices, np.zeros(dummy_amount)))
+        capacities = np.concatenate((capacities, np.full(dummy_amount, np.inf)))
+        return supply, demand, arc_suppliers, arc_consumers, prices, capacities
+
+    def solve(self, block_size: Optional[int]=None) -> tuple[list[dict[str, int | float]], int | float]:
+        with self.__stats.phase('balancing'):
+            supply, demand, arc_suppliers, arc_consumers, prices, capacities = self.__balanced_network()
+        self.__plan_shape = (len(supply), len(demand))
+        with self.__stats.phase('network_simplex'):
+            network = NetworkSimplex(supply, demand, arc_suppliers, arc_consumers, prices, capacities, block_size)
+            flows = network.solve(self.__stop_condition)
+        self.__stats.count('network_iterations', network.iterations)
+
+        routes_amount = len(self.__prices)
+        self.__flows = flows[:routes_amount]
+        used = np.flatnonzero(flows > 0)
+        roots = [
+            {
+                'supplier_id': supplier_idx,
+                'consumer_id': consumer_idx,
+                'amount': amount,
+                'epsilon': 0
+            }
+            for supplier_idx, consumer_idx, amount in zip(
+                arc_suppliers[used].tolist(), arc_consumers[used].tolist(), flows[used].tolist())
+        ]
+        return roots, float(self.__flows @ self.__prices)
+
+    @property
+    def stop_condition(self) -> Optional[Callable[[], bool]]:
+        return self.__stop_condition
+
+    @stop_condition.setter
+    def stop_condition(self, stop_condition: Optional[Callable[[], bool]]) -> None:
+        self.__stop_condition = stop_condition
+
+    @property
+    def flows(self) -> npt.NDArray[np.float64]:
+        return self.__flows
+
+    @property
+    def stats(self):
+        return self.__stats.as_dict()
+
+    @property
+    def amount_suppliers(self):
+        return self.__plan_shape[0]
+
+    @property
+    def amount_consumers(self):
+        return self.__plan_shape[1]
@@ -0,0 +1,165 @@
+from collections import deque
+import numpy as np
+import numpy.typing as npt
+
+
+class SpanningTree:
+    def __init__(self, suppliers_amount: int, consumers_amount: int, prices: npt.NDArray[np.float64],
+                 cells: list[tuple[int, int]]) -> None:
+        # Узлы 0..m-1 - поставщики, m..m+n-1 - потребители; базисные ячейки - ребра дерева
+        self.__suppliers_amount = suppliers_amount
+        self.__prices = prices
+        nodes_amount = suppliers_amount + consumers_amount
+        self.__parent = [-1] * nodes_amount
+        self.__depth = [0] * nodes_amount
+        self.__children = [set() for _ in range(nodes_amount)]
+        self.__potential = np.zeros(nodes_amount, dtype=prices.dtype)
+        self.__added_cells = []
+
+        adjacency = [[] for _ in range(nodes_amount)]
+        for supplier_id, consumer_id in cells:
+            adjacency[supplier_id].append(suppliers_amount + consumer_id)
+            adjacency[suppliers_amount + consumer_id].append(supplier_id)
+
+        visited = [False] * nodes_amount
+        self.__attach_component(0, adjacency, visited)
+        # Несвязный базис достраивается нулевыми ячейками: сначала через первого поставщика, затем через
+        # первого потребителя для поставщиков без ячеек
+        for node in range(suppliers_amount, nodes_amount):
+            if not visited[node]:
+                self.__link(0, node, adjacency, visited)
+        for node in range(suppliers_amount):
+            if not visited[node]:
+                self.__link(suppliers_amount, node, adjacency, visited)
+
+    def __link(self, tree_node: int, node: int, adjacency: list[list[int]], visited: list[bool]) -> None:
+        adjacency[tree_node].append(node)
+        adjacency[node].append(tree_node)
+        self.__added_cells.append(self.__cell(tree_node, node))
+        self.__parent[node] = tree_node
+        self.__children[tree_node].add(node)
+        self.__depth[node] = self.__depth[tree_node] + 1
+        self.__potential[node] = self.__child_potential(tree_node, node)
+        self.__attach_component(node, adjacency, visited)
+
+    def __attach_component(self, start: int, adjacency: list[list[int]], visited: list[bool]) -> None:
+        visited[start] = True
+        queue = deque([start])
+        while queue:
+            node = queue.popleft()
+            for neighbour in adjacency[node]:
+                if visited[neighbour]:
+                    continue
+                visited[neighbour] = True
+                self.__parent[neighbour] = node
+                self.__children[node].add(neighbour)
+                self.__depth[neighbour] = self.__depth[node] + 1
+                self.__potential[neighbour] = self.__child_potential(node, neighbour)
+                queue.append(neighbour)
+
+    def __cell(self, first_node: int, second_node: int) -> tuple[int, int]:
+        if first_node < self.__suppliers_amount:
+            return first_node, second_node - self.__suppliers_amount
+        return second_node, first_node - self.__suppliers_amount
+
+    def __child_potential(self, parent: int, child: int) -> float:
+        price = self.__prices[self.__cell(parent, child)]
+        if child >= self.__suppliers_amount:
+            return self.__potential[parent] + price
+        return self.__potential[parent] - price
+
+    def __is_ancestor(self, ancestor: int, node: int) -> bool:
+        while self.__depth[node] > self.__depth[ancestor]:
+            node = self.__parent[node]
+        return node == ancestor
+
+    def cycle(self, entering_cell: tuple[int, int]) -> tuple[list[tuple[int, int]], int]:
+        # Цикл входящей ячейки - путь в дереве между ее поставщиком и потребителем, ищется подъемом к общему предку
+        supplier_path, consumer_path = [entering_cell[0]], [self.__suppliers_amount + entering_cell[1]]
+        while supplier_path[-1] != consumer_path[-1]:
+            if self.__depth[supplier_path[-1]] >= self.__depth[consumer_path[-1]]:
+                supplier_path.append(self.__parent[supplier_path[-1]])
+            else:
+                consumer_path.append(self.__parent[consumer_path[-1]])
+        # Вместе с циклом возвращается позиция первой ячейки после общего предка
+        path = supplier_path + consumer_path[-2::-1]
+        return [entering_cell] + [self.__cell(first_node, second_node)
+                                  for first_node, second_node in zip(path, path[1:])], len(supplier_path)
+
+    def pivot(self, entering_cell: tuple[int, int], leaving_cell: tuple[int, int]) -> None:
+        leaving_supplier, leaving_consumer = leaving_cell[0], self.__suppliers_amount + leaving_cell[1]
+        subtree_root = (leaving_supplier if self.__parent[leaving_supplier] == leaving_consumer
+                        else leaving_consumer)
+
+        entering_supplier, entering_consumer = entering_cell[0], self.__suppliers_amount + entering_cell[1]
+        if self.__is_ancestor(subtree_root, entering_supplier):
+            new_root, outer_node = entering_supplier, entering_consumer
+        else:
+            new_root, outer_node = entering_consumer, entering_supplier
+
+        self.__children[self.__parent[subtree_root]].discard(subtree_root)
+        self.__parent[subtree_root] = -1
+
+        # Переворачиваем путь от новой вершины поддерева до старой и подвешиваем поддерево к входящему ребру
+        previous, node = outer_node, new_root
+        while node != -1:
+            next_node = self.__parent[node]
+            if next_node != -1:
+                self.__children[next_node].discard(node)
+            self.__parent[node] = previous
+            self.__children[previous].add(node)
+            previous, node = node, next_node
+
+        # Потенциалы внутри поддерева меняются на одну и ту же величину, остальная часть дерева не затрагивается
+        delta = self.__child_potential(outer_node, new_root) - self.__potential[new_root]
+        self.__depth[new_root] = self.__depth[outer_node] + 1
+        stack = [new_root]
+        subtree = []
+        while stack:
+            node = stack.pop()
+            subtree.append(node)
+            for child in self.__children[node]:
+                self.__depth[child] = self.__depth[node] + 1
+                stack.append(child)
+        self.__potential[subtree] += delta
+
+    def flows(self, supply: npt.NDArray[np.float64], demand: npt.NDArray[np.float64]
+              ) -> tuple[list[tuple[int, int]], list[float]]:
+        # Объем на ребре дерева равен избытку поддерева под ним, поддеревья обходятся от листьев к корню
+        excess = supply.tolist() + (-demand).tolist()
+        order, stack = [], [0]
+        while stack:
+            node = stack.pop()
+            order.append(node)
+            stack.extend(self.__children[node])
+
+        cells, amounts = [], []
+        for node in reversed(order[1:]):
+            parent = self.__parent[node]
+            cells.append(self.__cell(node, parent))
+            amounts.append(excess[node] if node < self.__suppliers_amount else -excess[node])
+            excess[parent] += excess[node]
+        return cells, amounts
+
+    def subtree(self, cell: tuple[int, int]) -> npt.NDArray[np.bool_]:
+        supplier_node, consumer_node = cell[0], self.__suppliers_amount + cell[1]
+        node = supplier_node if self.__parent[supplier_node] == consumer_node else consumer_node
+        nodes = np.zeros(len(self.__parent), dtype=bool)
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            nodes[node] = True
+            stack.extend(self.__children[node])
+        return nodes
+
+    @property
+    def supplier_potentials(self) -> npt.NDArray[np.float64]:
+        return self.__potential[:self.__suppliers_amount]
+
+    @property
+    def consumer_potentials(self) -> npt.NDArray[np.float64]:
+        return self.__potential[self.__suppliers_amount:]
+
+    @property
+    def added_cells(self) -> list[tuple[int, int]]:
+        return self.__added_cells
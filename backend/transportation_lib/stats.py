@@ -0,0 +1,27 @@
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Iterator
+
+
+class SolverStats:
+    def __init__(self) -> None:
+        self.__phases = defaultdict(float)
+        self.__counters = defaultdict(int)
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.__phases[name] += time.perf_counter() - start
+
+    def add_phase(self, name: str, seconds: float) -> None:
+        self.__phases[name] += seconds
+
+    def count(self, name: str, value: int = 1) -> None:
+        self.__counters[name] += value
+
+    def as_dict(self) -> dict[str, dict[str, float | int]]:
+        return {'phases': dict(self.__phases), 'counters': dict(self.__counters)}
@@ -78,3 +78,74 @@ class InvalidCapacityValue(Exception):
     def __str__(self) -> str:
         return (f'{self.__line_type} №{self.__line_num} имеет значение ({self.__line_value}) больше,'
                 f' чем пропускная способность {self.__value}')
+
+
+class InvalidPivotRule(Exception):
+    def __init__(self, rule: str, rules: tuple[str, ...]) -> None:
+        self.__rule = rule
+        self.__rules = rules
+
+    def __str__(self) -> str:
+        return f'Некорректное правило выбора входящей ячейки {self.__rule}, допустимые правила: {self.__rules}'
+
+
+class InvalidCapacityPlan(Exception):
+    def __init__(self, unallocated: int | float) -> None:
+        self.__unallocated = unallocated
+
+    def __str__(self) -> str:
+        return (f'Маршруты и их пропускные способности не позволяют распределить весь груз:'
+                f' нераспределенный остаток {self.__unallocated}')
+
+
+class InvalidRouteIndices(Exception):
+    def __init__(self, route: tuple[int, int], dimension: tuple[int, int]) -> None:
+        self.__route = route
+        self.__dimension = dimension
+
+    def __str__(self) -> str:
+        return (f'Маршрут от поставщика {self.__route[0]} к потребителю {self.__route[1]}'
+                f' выходит за пределы таблицы размерностью {self.__dimension}')
+
+
+class InvalidRouteCapacity(Exception):
+    def __init__(self, capacity: Any, route: tuple[int, int]) -> None:
+        self.__capacity = capacity
+        self.__route = route
+
+    def __str__(self) -> str:
+        return (f'Пропускная способность {self.__capacity} маршрута от поставщика {self.__route[0]}'
+                f' к потребителю {self.__route[1]} некорректна')
+
+
+class InvalidRenderFormat(Exception):
+    def __init__(self, fmt: str, formats: tuple[str, ...]) -> None:
+        self.__fmt = fmt
+        self.__formats = formats
+
+    def __str__(self) -> str:
+        return f'Некорректный формат отображения {self.__fmt}, допустимые форматы: {self.__formats}'
+
+
+class InvalidChangeIndices(Exception):
+    def __init__(self, indices: int | tuple[int, int], matrix_dimension: tuple[int, int]) -> None:
+        self.__indices = indices + 1 if isinstance(indices, int) else (indices[0] + 1, indices[1] + 1)
+        self.__matrix_dimension = matrix_dimension
+
+    def __str__(self) -> str:
+        return f'Некорректная позиция изменения {self.__indices} для матрицы размерностью {self.__matrix_dimension}'
+
+
+class SolveInterrupted(Exception):
+    def __init__(self, iterations: int) -> None:
+        self.__iterations = iterations
+
+    def __str__(self) -> str:
+        return f'Решение прервано после {self.__iterations} итераций'
+
+
+# Ошибки входных данных: таблица, ее изменения или параметры решения некорректны
+VALIDATION_ERRORS = (InvalidMatrixDimension, InvalidPriceValueError, InvalidAmountGood, InvalidRestrictionIndices,
+                     InvalidRestrictionSymbol, InvalidRestrictionValue, InvalidCapacitiesDimension,
+                     InvalidCapacityValue, InvalidPivotRule, InvalidCapacityPlan, InvalidRouteIndices,
+                     InvalidRouteCapacity, InvalidRenderFormat, InvalidChangeIndices)
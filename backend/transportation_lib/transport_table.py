@@ -1,14 +1,20 @@
 import copy
+import hashlib
+import time
 from abc import ABC
-from collections import deque
-from typing import Optional
+from typing import Callable, Optional
 import numpy as np
 import numpy.typing as npt
-from prettytable import PrettyTable
 from .transport_errors import (InvalidMatrixDimension, InvalidPriceValueError, InvalidAmountGood,
                                InvalidRestrictionValue, InvalidRestrictionIndices, InvalidRestrictionSymbol,
-                               InvalidCapacityValue, InvalidCapacitiesDimension)
-from .utils import create_eps_expression, root_validation, M_VAL, EPSILON_VAL, find_acyclic_plan, get_all_indices
+                               InvalidCapacityValue, InvalidCapacitiesDimension, InvalidRouteCapacity,
+                               InvalidChangeIndices, SolveInterrupted)
+from . import reporting
+from .network_simplex import NetworkSimplex
+from .pricing import PivotRule, reduced_costs
+from .spanning_tree import SpanningTree
+from .stats import SolverStats
+from .utils import M_VAL, EPSILON_VAL, INT_LIMIT, VogelLines
 
 
 class Participant(ABC):
@@ -105,133 +111,174 @@ class Root:
         return Root(self.price, self.supplier, self.consumer, self.amount, self.epsilon, self.repr, self.capacity)
 
 
-class TransportTable:
+class Plan:
+    def __init__(self, suppliers_amount: int, consumers_amount: int, dtype: type = np.float64) -> None:
+        self.amount = np.zeros((suppliers_amount, consumers_amount), dtype=dtype)
+        self.filled = np.zeros((suppliers_amount, consumers_amount), dtype=bool)
+
+    def __copy__(self):
+        plan = Plan(0, 0)
+        plan.amount = self.amount.copy()
+        plan.filled = self.filled.copy()
+        return plan
+
+    def put(self, supplier_id: int, consumer_id: int, amount: int | float) -> None:
+        self.amount[supplier_id, consumer_id] = amount
+        self.filled[supplier_id, consumer_id] = True
+
+    def shrink(self, suppliers_amount: int, consumers_amount: int) -> None:
+        self.amount = self.amount[:suppliers_amount, :consumers_amount]
+        self.filled = self.filled[:suppliers_amount, :consumers_amount]
+
+
+class TransportTable:  # pylint: disable=too-many-public-methods
     def __init__(self, suppliers: list[float | int], consumers: list[float | int],
                  price_matrix: npt.NDArray[npt.NDArray[float]], restrictions: dict[tuple[int, int],
             tuple[str, int]] = None, capacities: list[list[float | int]] = None) -> None:
+        start = time.perf_counter()
+        self.__stats = SolverStats()
         self.__suppliers_amount = len(suppliers)
         self.__consumers_amount = len(consumers)
-        self.__suppliers = np.array([Supplier(supplier, supplier_id)
-                                     for supplier_id, supplier in enumerate(suppliers)], dtype=Supplier)
-        self.__consumers = np.array([Consumer(consumer, consumer_id)
-                                     for consumer_id, consumer in enumerate(consumers)], dtype=Consumer)
 
-        self.__restrictions = restrictions or {}
-        self.__price_matrix = np.zeros((self.__suppliers_amount, self.__consumers_amount), dtype=Root)
-        self.__capacities = capacities
+        # Состояние участников хранится в виде векторов: текущий остаток и исходный объем
+        self.__supply = np.array(suppliers, dtype=np.float64).reshape(-1)
+        self.__real_supply = self.__supply.copy()
+        self.__demand = np.array(consumers, dtype=np.float64).reshape(-1)
+        self.__real_demand = self.__demand.copy()
 
-        for supplier_id, prices in enumerate(price_matrix):
-            for consumer_id, price in enumerate(prices):
-                supplier = self.__suppliers[supplier_id]
-                consumer = self.__consumers[consumer_id]
-                self.__price_matrix[supplier_id][consumer_id] = Root(price, supplier, consumer)
+        self.__restrictions = restrictions or {}
+        self.__prices = self.__create_price_array(price_matrix)
+        self.__capacities = None
+        self.__dummy_supplier = None
+        self.__dummy_consumer = None
 
         self.__validate_table()
 
-        if self.__capacities is not None:
-            self.__capacities = np.array(self.__capacities)
+        if capacities is not None:
+            self.__capacities = np.array(capacities, dtype=np.float64)
             self.__validate_capacities()
-            for supplier_id, prices in enumerate(price_matrix):
-                for consumer_id, price in enumerate(prices):
-                    self.__price_matrix[supplier_id][consumer_id].capacity = self.__capacities[supplier_id][consumer_id]
-
-        self.__basic_plan = np.zeros((self.__suppliers_amount, self.__consumers_amount), dtype=Root)
-        self.__solution = np.zeros((self.__suppliers_amount, self.__consumers_amount))
+        self.__fingerprint = self.__create_fingerprint()
+
+        self.__network = None
+        self.__iterations = 0
+        # Проверяется на каждой итерации: позволяет вызывающему коду прервать решение по сроку или отмене
+        self.__stop_condition = None
+        self.__dtype = np.float64
+        self.__basic_plan = Plan(self.__suppliers_amount, self.__consumers_amount)
+        self.__solution = Plan(self.__suppliers_amount, self.__consumers_amount)
+        self.__set_dtype(self.__detect_dtype())
+        self.__stats.add_phase('construction', time.perf_counter() - start)
 
     def pprint(self) -> None:
-        table = PrettyTable([''] + [f'T{i + 1}' for i in range(self.price_matrix[0].size)] + ['A'])
-        for i in range(self.price_matrix.shape[0]):
-            row = [f'S{i + 1}']
-            for j in range(self.price_matrix[i].size):
-                row.append(self.price_matrix[i][j].price if self.price_matrix[i][j].price != M_VAL else 'M')
-            row.append(create_eps_expression(self.suppliers[i].real_epsilon, self.suppliers[i].real_amount))
-            table.add_row(row)
-        row = ['B']
-        for i in range(self.consumers.size):
-            row.append(create_eps_expression(self.consumers[i].real_epsilon, self.consumers[i].real_amount))
-        row.append('')
-        table.add_row(row)
-        print(table)
-
-    def pprint_res(self, solution: npt.NDArray[npt.NDArray[np.float16]]) -> None:
-        table = PrettyTable([''] + [f'T{i + 1}' for i in range(self.price_matrix[0].size)] + ['A'])
-        for i in range(len(solution)):
-            row = [f'S{i + 1}']
-            for j in range(len(solution[i])):
-                row.append(solution[i][j].repr)
-            row.append(create_eps_expression(self.suppliers[i].real_epsilon, self.suppliers[i].real_amount))
-            table.add_row(row)
-        row = ['B']
-        for i in range(self.consumers.size):
-            row.append(create_eps_expression(self.consumers[i].real_epsilon, self.consumers[i].real_amount))
-        row.append('')
-        table.add_row(row)
-        print(table)
+        print(self.render(plan=None))
+
+    def pprint_res(self, solution: Plan) -> None:
+        print(reporting.render(*reporting.plan_rows(solution.amount, solution.filled, self.__real_supply,
+                                                    self.__real_demand)))
+
+    def render(self, fmt: str = 'text', plan: Optional[str] = 'optimal') -> str:
+        # Отображение строится только по запросу, решение таблицы строки не форматирует
+        if plan is None:
+            rows = reporting.price_rows(self.__prices, self.__real_supply, self.__real_demand)
+        else:
+            solution = self.__solution if plan == 'optimal' else self.__basic_plan
+            rows = reporting.plan_rows(solution.amount, solution.filled, self.__real_supply, self.__real_demand)
+        return reporting.render(*rows, fmt)
 
     def check_table_balance(self) -> bool:
-        goods = np.vectorize(lambda x: x.goods_amount)
-        return np.sum(goods(self.suppliers)) == np.sum(goods(self.consumers))
+        return self.__supply.sum() == self.__demand.sum()
 
-    def __restore_price_matrix_values(self) -> None:
-        for supplier in self.suppliers:
-            supplier.goods_amount = supplier.real_amount
-        for consumer in self.consumers:
-            consumer.goods_amount = consumer.real_amount
-
-    def __get_min_valid_root(self) -> Optional[Root]:
-        reshaped_matrix = self.price_matrix.copy().reshape(-1)
-        reshaped_matrix.sort()
-        for root in reshaped_matrix:
-            if root_validation(root.consumer.goods_amount, root.supplier.goods_amount, root.consumer.epsilon,
-                               root.supplier.epsilon,
-                               self.__basic_plan[root.supplier.id][root.consumer.id].amount == root.capacity):
-                return root
-        return None
-
-    def __get_min_cell_value(self, root: Root) -> tuple[int | float, int]:
+    def __create_price_array(self, price_matrix: npt.NDArray[npt.NDArray[float]]) -> npt.NDArray[np.float64]:
+        for prices in price_matrix:
+            if len(prices) != self.__consumers_amount:
+                raise InvalidMatrixDimension(self.__consumers_amount, len(prices))
+        if len(price_matrix) != self.__suppliers_amount:
+            raise InvalidMatrixDimension(self.__suppliers_amount, len(price_matrix))
+
+        try:
+            return np.array(price_matrix, dtype=np.float64).reshape(self.__suppliers_amount, self.__consumers_amount)
+        except (TypeError, ValueError):
+            for supplier_id, prices in enumerate(price_matrix, 1):
+                for consumer_id, price in enumerate(prices, 1):
+                    if not isinstance(price, (int, float, np.number)):
+                        raise InvalidPriceValueError(price, (supplier_id, consumer_id)) from None
+            raise
+
+    def __create_fingerprint(self) -> str:
+        # Отпечаток исходных данных не зависит от представления чисел: все массивы приведены к float64
+        digest = hashlib.sha256(np.array(self.__prices.shape, dtype=np.int64).tobytes())
+        for array in (self.__supply, self.__demand, self.__prices):
+            digest.update(array.tobytes())
+        digest.update(repr(sorted(self.__restrictions.items())).encode())
+        digest.update(self.__capacities.tobytes() if self.__capacities is not None else b'-')
+        return digest.hexdigest()
+
+    def __detect_dtype(self) -> type:
+        # Целочисленный режим выбирается, только если все данные целые, а стоимости и потенциалы
+        # гарантированно помещаются в int64; иначе вычисления ведутся в float64
+        arrays = [self.__real_supply, self.__real_demand, self.__prices]
         if self.__capacities is not None:
-            available_capacity = root.capacity - self.__basic_plan[root.supplier.id][root.consumer.id].amount
-            min_goods = min(root.supplier.goods_amount, root.consumer.goods_amount, available_capacity)
-            return (min_goods,
-                    root.supplier.epsilon if min_goods == root.supplier.goods_amount else
-                    root.consumer.epsilon if min_goods == root.consumer.goods_amount else 0)
-
-        if root.consumer.goods_amount < root.supplier.goods_amount:
-            return root.consumer.goods_amount, root.consumer.epsilon
-        if root.consumer.goods_amount > root.supplier.goods_amount:
-            return root.supplier.goods_amount, root.supplier.epsilon
-        return root.supplier.goods_amount, min(root.supplier.epsilon, root.consumer.epsilon)
+            arrays.append(self.__capacities[np.isfinite(self.__capacities)])
+        if not all(np.array_equal(array, np.trunc(array)) for array in arrays):
+            return np.float64
+        max_price = max(self.__prices.max(initial=0), M_VAL if self.__restrictions else 0)
+        total = self.__real_supply.sum() + self.__real_demand.sum()
+        bound = max(total, self.__suppliers_amount + self.__consumers_amount)
+        return np.int64 if max_price * bound < INT_LIMIT else np.float64
+
+    def __set_dtype(self, dtype: type) -> None:
+        # Пропускные способности остаются в float64: фиктивные линии не ограничены (np.inf)
+        if dtype == self.__dtype:
+            return
+        self.__dtype = dtype
+        self.__supply = self.__supply.astype(dtype)
+        self.__real_supply = self.__real_supply.astype(dtype)
+        self.__demand = self.__demand.astype(dtype)
+        self.__real_demand = self.__real_demand.astype(dtype)
+        self.__prices = self.__prices.astype(dtype)
+        for plan in (self.__basic_plan, self.__solution):
+            plan.amount = plan.amount.astype(dtype)
+
+    def __restore_price_matrix_values(self) -> None:
+        self.__supply[:] = self.__real_supply
+        self.__demand[:] = self.__real_demand
+
+    def __source_dimension(self) -> tuple[int, int]:
+        return (self.__suppliers_amount - (self.__dummy_supplier is not None),
+                self.__consumers_amount - (self.__dummy_consumer is not None))
 
     def __validate_capacities(self) -> None:
-        if (self.__capacities.shape[0] != self.__suppliers_amount or
+        if (self.__capacities.ndim != 2 or self.__capacities.shape[0] != self.__suppliers_amount or
                 self.__capacities.shape[1] != self.__consumers_amount):
-            raise InvalidCapacitiesDimension(self.__capacities.shape, self.price_matrix.shape)
-
-        row_sums = self.__capacities.sum(axis=1)
-        column_sums = self.__capacities.sum(axis=0)
-        for idx, row_sum in enumerate(row_sums):
-            if row_sum < self.suppliers[idx]:
-                raise InvalidCapacityValue(row_sum, self.suppliers[idx].goods_amount, idx + 1, 0)
-        for idx, column_sum in enumerate(column_sums):
-            if column_sum < self.consumers[idx]:
-                raise InvalidCapacityValue(column_sum, self.suppliers[idx].goods_amount, idx + 1, 0)
+            raise InvalidCapacitiesDimension(self.__capacities.shape, self.__prices.shape)
+
+        for supplier_id, consumer_id in np.argwhere(~(self.__capacities >= 0)):
+            raise InvalidRouteCapacity(self.__capacities[supplier_id, consumer_id], (supplier_id + 1, consumer_id + 1))
+
+        # Фиктивные линии не ограничены, поэтому суммы сравниваются только по исходным линиям
+        suppliers_amount, consumers_amount = self.__source_dimension()
+        capacities = self.__capacities[:suppliers_amount, :consumers_amount]
+        supply, demand = self.__real_supply[:suppliers_amount], self.__real_demand[:consumers_amount]
+        row_sums = capacities.sum(axis=1)
+        column_sums = capacities.sum(axis=0)
+        for idx in np.flatnonzero(row_sums < supply):
+            raise InvalidCapacityValue(row_sums[idx], supply[idx], idx + 1, 0)
+        for idx in np.flatnonzero(column_sums < demand):
+            raise InvalidCapacityValue(column_sums[idx], demand[idx], idx + 1, 1)
 
     def __validate_table(self) -> None:
-        for supplier_id, supplier in enumerate(self.suppliers):
-            if not isinstance(supplier.goods_amount, (int, float)) or supplier <= 0:
-                raise InvalidAmountGood(supplier, 0, supplier_id)
+        for supplier_id in np.flatnonzero(~(self.__supply > 0)):
+            raise InvalidAmountGood(self.__supply[supplier_id], 0, supplier_id)
 
-        for consumer_id, consumer in enumerate(self.consumers):
-            if not isinstance(consumer.goods_amount, (int, float)) or consumer <= 0:
-                raise InvalidAmountGood(consumer, 1, consumer_id)
+        for consumer_id in np.flatnonzero(~(self.__demand > 0)):
+            raise InvalidAmountGood(self.__demand[consumer_id], 1, consumer_id)
 
-        for supplier_id, prices in enumerate(self.price_matrix, 1):
-            if len(prices) != self.__consumers_amount:
-                raise InvalidMatrixDimension(self.__consumers_amount, len(prices))
-            for consumer_id, root in enumerate(prices, 1):
-                if not isinstance(root.price, (int, float, np.float16)) or root.price < 0:
-                    raise InvalidPriceValueError(root.price, (supplier_id, consumer_id))
+        for supplier_id, consumer_id in np.argwhere(~(self.__prices >= 0)):
+            raise InvalidPriceValueError(self.__prices[supplier_id, consumer_id], (supplier_id + 1, consumer_id + 1))
+
+        self.__validate_restrictions()
 
+    def __validate_restrictions(self) -> None:
         if self.__restrictions:
             for cell, restriction in self.__restrictions.items():
                 if not self.__suppliers_amount > cell[0] >= 0 or not self.__consumers_amount > cell[1] >= 0:
@@ -240,551 +287,454 @@ class TransportTable:
                 if restriction[0] not in ['>', '<']:
                     raise InvalidRestrictionSymbol(restriction[0])
 
-                consumer_value = self.price_matrix[cell[0]][cell[1]].consumer
-                supplier_value = self.price_matrix[cell[0]][cell[1]].supplier
+                consumer_value = self.__demand[cell[1]]
+                supplier_value = self.__supply[cell[0]]
                 if restriction[1] > consumer_value or restriction[1] > supplier_value or restriction[1] < 0:
-                    raise InvalidRestrictionValue(restriction[1], (0,
-                                                                   min(consumer_value, supplier_value).real_amount))
+                    raise InvalidRestrictionValue(restriction[1], (0, min(consumer_value, supplier_value)))
+
+    def __append_supplier(self, amount: int | float, prices: npt.NDArray[np.float64],
+                          capacities: Optional[npt.NDArray[np.float64]] = None) -> None:
+        self.__stats.count('extensions')
+        self.__suppliers_amount += 1
+        self.__supply = np.append(self.__supply, self.__dtype(amount))
+        self.__real_supply = np.append(self.__real_supply, self.__dtype(amount))
+        self.__prices = np.concatenate((self.__prices, prices.reshape(1, -1)), axis=0)
+        if self.__capacities is not None:
+            if capacities is None:
+                capacities = np.full(self.__consumers_amount, np.inf)
+            self.__capacities = np.concatenate((self.__capacities, capacities.reshape(1, -1)), axis=0)
+
+    def __append_consumer(self, amount: int | float, prices: npt.NDArray[np.float64],
+                          capacities: Optional[npt.NDArray[np.float64]] = None) -> None:
+        self.__stats.count('extensions')
+        self.__consumers_amount += 1
+        self.__demand = np.append(self.__demand, self.__dtype(amount))
+        self.__real_demand = np.append(self.__real_demand, self.__dtype(amount))
+        self.__prices = np.concatenate((self.__prices, prices.reshape(-1, 1)), axis=1)
+        if self.__capacities is not None:
+            if capacities is None:
+                capacities = np.full(self.__suppliers_amount, np.inf)
+            self.__capacities = np.concatenate((self.__capacities, capacities.reshape(-1, 1)), axis=1)
 
     def __balance_table(self) -> None:
-        goods = np.vectorize(lambda x: x.goods_amount)
-        total_suppliers_goods = np.sum(goods(self.suppliers))
-        total_consumers_goods = np.sum(goods(self.consumers))
+        total_suppliers_goods = self.__supply.sum()
+        total_consumers_goods = self.__demand.sum()
         abs_difference = abs(total_suppliers_goods - total_consumers_goods)
         if total_suppliers_goods > total_consumers_goods:
-            self.__consumers_amount += 1
-            new_consumer = Consumer(abs_difference, self.__consumers_amount - 1)
-            self.__consumers = np.append(self.__consumers, new_consumer)
-            new_line = np.empty((self.__suppliers_amount, 1), dtype=Root)
-            for i in range(self.__suppliers_amount):
-                new_line[i][0] = Root(0, self.suppliers[i], new_consumer)
-            self.__price_matrix = np.concatenate((self.__price_matrix, new_line), axis=1)
+            self.__append_consumer(abs_difference, np.zeros(self.__suppliers_amount, dtype=self.__dtype))
+            self.__dummy_consumer = self.__consumers_amount - 1
         else:
-            self.__suppliers_amount += 1
-            new_supplier = Supplier(abs_difference,  self.__suppliers_amount - 1)
-            self.__suppliers = np.append(self.__suppliers, new_supplier)
-            new_line = np.empty((1, self.__consumers_amount), dtype=Root)
-            for i in range(self.__consumers_amount):
-                new_line[0][i] = Root(0, new_supplier, self.consumers[i])
-            self.__price_matrix = np.concatenate((self.price_matrix, new_line), axis=0)
-
-    def __epsilon_modify_table(self) -> None:
-        for supplier in self.suppliers:
-            supplier.epsilon = 1
-            supplier.real_epsilon = 1
-        self.consumers[-1].epsilon = self.__suppliers_amount
-        self.consumers[-1].real_epsilon = self.__suppliers_amount
-
-    def __check_balance_equations(self) -> bool:
-        for supplier in self.suppliers:
-            if supplier.goods_amount != 0 or supplier.epsilon != 0:
-                return False
-        for consumer in self.consumers:
-            if consumer.goods_amount != 0 or consumer.epsilon != 0:
-                return False
-        return True
-
-    def __get_disbalanced_participants(self) -> tuple[dict[int, tuple[int, float]], dict[int, tuple[int, float]]]:
-        disbalanced_suppliers = {}
-        disbalanced_consumers = {}
-        for supplier in self.suppliers:
-            if supplier.goods_amount != 0 or supplier.epsilon != 0:
-                disbalanced_suppliers[supplier.id] = (supplier.goods_amount, supplier.epsilon)
-        for consumer in self.consumers:
-            if consumer.goods_amount != 0 or consumer.epsilon != 0:
-                disbalanced_consumers[consumer.id] = (consumer.goods_amount, consumer.epsilon)
-        return disbalanced_suppliers, disbalanced_consumers
-
-    def __north_western_method(self) -> tuple[npt.NDArray[Root], int | float]:
-        self.__basic_plan = np.zeros((self.__suppliers_amount, self.__consumers_amount), dtype=Root)
-        for supplier_id in range(self.__suppliers_amount):
-            for consumer_id in range(self.__consumers_amount):
-                self.__basic_plan[supplier_id][consumer_id] = copy.copy(self.price_matrix[supplier_id][consumer_id])
+            self.__append_supplier(abs_difference, np.zeros(self.__consumers_amount, dtype=self.__dtype))
+            self.__dummy_supplier = self.__suppliers_amount - 1
+
+    def __rebalance_table(self) -> None:
+        # После изменения объемов фиктивные линии обнуляются и пересчитываются, недостающая добавляется заново
+        if self.__dummy_supplier is not None:
+            self.__real_supply[self.__dummy_supplier] = 0
+        if self.__dummy_consumer is not None:
+            self.__real_demand[self.__dummy_consumer] = 0
+        difference = self.__real_supply.sum() - self.__real_demand.sum()
+        if difference > 0 and self.__dummy_consumer is not None:
+            self.__real_demand[self.__dummy_consumer] = difference
+        elif difference < 0 and self.__dummy_supplier is not None:
+            self.__real_supply[self.__dummy_supplier] = -difference
+        self.__restore_price_matrix_values()
+        if not self.check_table_balance():
+            self.__balance_table()
 
-        consumer_id = 0
+    def __validate_changes(self, supply: dict[int, int | float], demand: dict[int, int | float],
+                           prices: dict[tuple[int, int], int | float],
+                           capacities: dict[tuple[int, int], int | float]) -> None:
+        # Изменения касаются только исходных линий: фиктивные пересчитываются при балансировке
+        dimension = self.__source_dimension()
+        for supplier_id, amount in supply.items():
+            if not dimension[0] > supplier_id >= 0:
+                raise InvalidChangeIndices(supplier_id, dimension)
+            if not amount > 0:
+                raise InvalidAmountGood(amount, 0, supplier_id)
+        for consumer_id, amount in demand.items():
+            if not dimension[1] > consumer_id >= 0:
+                raise InvalidChangeIndices(consumer_id, dimension)
+            if not amount > 0:
+                raise InvalidAmountGood(amount, 1, consumer_id)
+        for cell in (*prices, *capacities):
+            if not dimension[0] > cell[0] >= 0 or not dimension[1] > cell[1] >= 0:
+                raise InvalidChangeIndices(cell, dimension)
+        for (supplier_id, consumer_id), price in prices.items():
+            if not price >= 0:
+                raise InvalidPriceValueError(price, (supplier_id + 1, consumer_id + 1))
+
+    def __apply_changes(self, supply: Optional[dict[int, int | float]], demand: Optional[dict[int, int | float]],
+                        prices: Optional[dict[tuple[int, int], int | float]],
+                        capacities: Optional[dict[tuple[int, int], int | float]]) -> None:
+        supply, demand, prices, capacities = supply or {}, demand or {}, prices or {}, capacities or {}
+        self.__validate_changes(supply, demand, prices, capacities)
+        # Изменения вносятся в float64, после чего режим вычислений выбирается заново по новым данным
+        self.__set_dtype(np.float64)
+        for supplier_id, amount in supply.items():
+            self.__real_supply[supplier_id] = amount
+        for consumer_id, amount in demand.items():
+            self.__real_demand[consumer_id] = amount
+        for cell, price in prices.items():
+            self.__prices[cell] = price
+        if self.__capacities is not None:
+            for cell, capacity in capacities.items():
+                self.__capacities[cell] = capacity
+        # Новые объемы проверяются теми же условиями, что и при создании таблицы
+        if self.__capacities is not None:
+            self.__validate_capacities()
+        with self.__stats.phase('balancing'):
+            self.__rebalance_table()
+        self.__validate_restrictions()
+        self.__set_dtype(self.__detect_dtype())
+
+    @staticmethod
+    def __close_lines(supplier_done: bool, consumer_done: bool, suppliers_left: int, consumers_left: int
+                      ) -> tuple[bool, bool]:
+        # Если строка и столбец исчерпаны одновременно, закрывается только одна линия: вторая получит нулевую
+        # базисную ячейку, и план остается остовным деревом без ε-возмущения и повторного построения
+        if supplier_done and consumer_done and (suppliers_left > 1 or consumers_left > 1):
+            return suppliers_left > 1, suppliers_left == 1
+        return supplier_done, consumer_done
+
+    def __north_western_method(self) -> tuple[Plan, int | float]:
+        supply_bounds = np.cumsum(self.__supply).tolist()
+        demand_bounds = np.cumsum(self.__demand).tolist()
+        last_supplier, last_consumer = self.__suppliers_amount - 1, self.__consumers_amount - 1
+
+        # Слияние накопленных сумм запасов и потребностей: каждая граница закрывает строку или столбец,
+        # при совпадении границ закрывается строка, а следующая ячейка входит в план с нулевым объемом
+        supplier_ids, consumer_ids, amounts = [], [], []
+        previous = 0
         supplier_id = 0
-        cost = 0
-        while consumer_id != self.__consumers_amount and supplier_id != self.__suppliers_amount:
-            root = self.price_matrix[supplier_id][consumer_id]
-            goods_amount, eps = self.__get_min_cell_value(root)
-            self.__basic_plan[supplier_id][consumer_id].amount = goods_amount
-            self.__basic_plan[supplier_id][consumer_id].epsilon = eps
-            self.__basic_plan[supplier_id][consumer_id].repr = create_eps_expression(eps, goods_amount)
-            cost += root.price * goods_amount
-            if (root.consumer < root.supplier or
-                    (root.consumer.epsilon < root.supplier.epsilon and root.consumer == root.supplier)):
-                root.supplier.goods_amount -= goods_amount
-                root.supplier.epsilon -= eps
-                consumer_id += 1
-            elif (root.consumer > root.supplier or
-                  (root.consumer.epsilon > root.supplier.epsilon and root.consumer == root.supplier)):
-                root.consumer.goods_amount -= goods_amount
-                root.consumer.epsilon -= eps
+        consumer_id = 0
+        while True:
+            bound = min(supply_bounds[supplier_id], demand_bounds[consumer_id])
+            supplier_ids.append(supplier_id)
+            consumer_ids.append(consumer_id)
+            amounts.append(bound - previous)
+            previous = bound
+            if supplier_id == last_supplier and consumer_id == last_consumer:
+                break
+            if supplier_id != last_supplier and supply_bounds[supplier_id] <= demand_bounds[consumer_id]:
                 supplier_id += 1
             else:
-                if supplier_id == self.__suppliers_amount - 1 and consumer_id == self.__consumers_amount - 1:
-                    break
-                self.__restore_price_matrix_values()
-                self.__epsilon_modify_table()
-                return self.__north_western_method()
-        return self.__basic_plan, cost
-
-    def __minimum_cost_method(self) -> tuple[npt.NDArray[Root], int | float]:
-        self.__basic_plan = np.zeros((self.__suppliers_amount, self.__consumers_amount), dtype=Root)
-        for supplier_id in range(self.__suppliers_amount):
-            for consumer_id in range(self.__consumers_amount):
-                self.__basic_plan[supplier_id][consumer_id] = copy.copy(self.price_matrix[supplier_id][consumer_id])
-
-        counter = 0
-        cost = 0
-        root = self.__get_min_valid_root()
-        while root:
-            goods_amount, eps = self.__get_min_cell_value(root)
-            cost += root.price * goods_amount
-
-            root.supplier.goods_amount -= goods_amount
-            root.consumer.goods_amount -= goods_amount
-            if root.consumer == root.supplier:
-                eps = min(root.consumer.epsilon, root.supplier.epsilon)
-            root.supplier.epsilon -= eps
-            root.consumer.epsilon -= eps
-
-            self.__basic_plan[root.supplier.id][root.consumer.id].amount = goods_amount
-            self.__basic_plan[root.supplier.id][root.consumer.id].epsilon = eps
-            self.__basic_plan[root.supplier.id][root.consumer.id].repr = create_eps_expression(eps, goods_amount)
-            counter += 1
-
-            root = self.__get_min_valid_root()
-
-        if counter < self.__consumers_amount + self.__suppliers_amount - 1:
-            self.__restore_price_matrix_values()
-            self.__epsilon_modify_table()
-            return self.__minimum_cost_method()
-
-        return self.__basic_plan, cost
+                consumer_id += 1
 
-    def __vogel_method(self) -> tuple[npt.NDArray[Root], int | float]:
-        self.__basic_plan = np.zeros((self.__suppliers_amount, self.__consumers_amount), dtype=Root)
-        for supplier_id in range(self.__suppliers_amount):
-            for consumer_id in range(self.__consumers_amount):
-                self.__basic_plan[supplier_id][consumer_id] = copy.copy(self.price_matrix[supplier_id][consumer_id])
+        self.__basic_plan = Plan(self.__suppliers_amount, self.__consumers_amount, self.__dtype)
+        self.__basic_plan.amount[supplier_ids, consumer_ids] = amounts
+        self.__basic_plan.filled[supplier_ids, consumer_ids] = True
+
+        self.__supply[:] = 0
+        self.__demand[:] = 0
+        cost = np.dot(self.__prices[supplier_ids, consumer_ids], amounts)
+        return self.__basic_plan, self.__dtype(cost).item()
+
+    def __minimum_cost_method(self) -> tuple[Plan, int | float]:
+        # Матрица стоимостей сортируется один раз, далее курсор только пропускает закрытые строки и столбцы
+        order = np.argsort(self.__prices, axis=None, kind='stable')
+        plan = Plan(self.__suppliers_amount, self.__consumers_amount, self.__dtype)
+        supply, demand = self.__supply.tolist(), self.__demand.tolist()
+        alive_suppliers, alive_consumers = [True] * self.__suppliers_amount, [True] * self.__consumers_amount
+        suppliers_left, consumers_left = self.__suppliers_amount, self.__consumers_amount
+        capacities = self.__capacities.ravel()[order].tolist() if self.__capacities is not None else None
+        prices = self.__prices.ravel()[order].tolist()
 
         cost = 0
-        counter = 0
-
-        while True:
-            line_type, line_index = self.__get_max_penalty_line()
-            if line_index is None:
-                break
-            line = self.__basic_plan[line_index] if line_type == 'row' else self.__basic_plan[:, line_index]
-            root = self.__get_min_cost_cell(line)
-            if not root:
+        for position, (supplier_id, consumer_id) in enumerate(zip(*(ids.tolist() for ids in np.divmod(
+                order, self.__consumers_amount)))):
+            if suppliers_left == 0 or consumers_left == 0:
                 break
+            if not alive_suppliers[supplier_id] or not alive_consumers[consumer_id]:
+                continue
 
-            supplier_idx = root.supplier.id
-            consumer_idx = root.consumer.id
-
-            if hasattr(root, 'capacity') and root.capacity:
-                amount = min(root.supplier.goods_amount, root.consumer.goods_amount, root.capacity)
-            else:
-                amount = min(root.supplier.goods_amount, root.consumer.goods_amount)
-
-            if root.consumer.goods_amount == root.supplier.goods_amount:
-                eps = min(root.consumer.epsilon, root.supplier.epsilon)
-            elif root.consumer.goods_amount == 0 and root.consumer.epsilon > root.supplier.epsilon:
-                eps = min(root.consumer.epsilon, root.supplier.epsilon)
-            elif root.supplier.goods_amount == 0 and root.supplier.epsilon < root.consumer.epsilon:
-                eps = min(root.consumer.epsilon, root.supplier.epsilon)
-            else:
-                eps = max(root.consumer.epsilon, root.supplier.epsilon)
-
-            self.__basic_plan[supplier_idx][consumer_idx].amount = amount
-
-            root.supplier.goods_amount -= amount
-            root.consumer.goods_amount -= amount
-            root.supplier.epsilon -= eps
-            root.consumer.epsilon -= eps
-
-            self.__basic_plan[root.supplier.id][root.consumer.id].amount = amount
-            self.__basic_plan[root.supplier.id][root.consumer.id].epsilon = eps
-            self.__basic_plan[root.supplier.id][root.consumer.id].repr = create_eps_expression(eps, amount)
+            goods_amount = min(supply[supplier_id], demand[consumer_id])
+            if capacities is not None:
+                goods_amount = min(goods_amount, capacities[position])
+            supply[supplier_id] -= goods_amount
+            demand[consumer_id] -= goods_amount
+            plan.put(supplier_id, consumer_id, goods_amount)
+            cost += prices[position] * goods_amount
+
+            supplier_done, consumer_done = self.__close_lines(supply[supplier_id] == 0, demand[consumer_id] == 0,
+                                                              suppliers_left, consumers_left)
+            if supplier_done:
+                alive_suppliers[supplier_id] = False
+                suppliers_left -= 1
+            if consumer_done:
+                alive_consumers[consumer_id] = False
+                consumers_left -= 1
+
+        self.__supply[:] = supply
+        self.__demand[:] = demand
+        self.__basic_plan = plan
+        return plan, self.__dtype(cost).item()
+
+    def __vogel_method(self) -> tuple[Plan, int | float]:
+        plan = Plan(self.__suppliers_amount, self.__consumers_amount, self.__dtype)
+        supply, demand = self.__supply.tolist(), self.__demand.tolist()
+        # Нижняя граница '>' уже вычтена из запасов и потребностей, поэтому заранее закрываются только ячейки
+        # с исчерпанной верхней границей '<'
+        lines = VogelLines(self.__prices, [True] * self.__suppliers_amount, [True] * self.__consumers_amount,
+                           [cell for cell in self.__restrictions if self.__is_restriction_reached(*cell, 0)])
+        suppliers_left, consumers_left = self.__suppliers_amount, self.__consumers_amount
 
-            cost += root.price * amount
-            counter += 1
+        cost = 0
+        cell = lines.select()
+        while cell is not None:
+            self.__check_stop()
+            supplier_idx, consumer_idx = cell
+            amount = min(supply[supplier_idx], demand[consumer_idx])
+            capacity = self.__capacities[cell] if self.__capacities is not None else None
+            if capacity is not None:
+                amount = min(amount, capacity)
+
+            supply[supplier_idx] -= amount
+            demand[consumer_idx] -= amount
+            plan.put(supplier_idx, consumer_idx, amount)
+            cost += self.__prices[cell] * amount
+
+            if self.__is_restriction_reached(supplier_idx, consumer_idx, amount) or amount == capacity:
+                lines.block(supplier_idx, consumer_idx)
+            supplier_done, consumer_done = self.__close_lines(supply[supplier_idx] == 0, demand[consumer_idx] == 0,
+                                                              suppliers_left, consumers_left)
+            suppliers_left -= supplier_done
+            consumers_left -= consumer_done
+            lines.update(supplier_idx, consumer_idx, not supplier_done, not consumer_done)
+            cell = lines.select()
+
+        if max(supply) > EPSILON_VAL or max(demand) > EPSILON_VAL:
+            # Закрытые ячейки не дали распределить весь груз: план строится методом минимальной стоимости
+            return self.__minimum_cost_method()
 
-        if counter < self.__consumers_amount + self.__suppliers_amount - 1:
-            self.__restore_price_matrix_values()
-            self.__epsilon_modify_table()
-            return self.__vogel_method()
+        self.__supply[:] = supply
+        self.__demand[:] = demand
+        self.__basic_plan = plan
+        return plan, self.__dtype(cost).item()
 
-        return self.__basic_plan, cost
+    def __check_stop(self) -> None:
+        if self.__stop_condition is not None and self.__stop_condition():
+            raise SolveInterrupted(self.__iterations)
 
-    def __is_cell_available(self, cell: Root) -> bool:
-        supplier_amount = cell.supplier.goods_amount
-        consumer_amount = cell.consumer.goods_amount
-        supplier_eps = cell.supplier.epsilon
-        consumer_eps = cell.consumer.epsilon
-        if supplier_amount <= 0 and consumer_amount <= 0 and (supplier_eps <= 0 or consumer_eps <= 0):
+    def __is_restriction_reached(self, supplier_id: int, consumer_id: int, amount: int | float) -> bool:
+        if (supplier_id, consumer_id) not in self.__restrictions:
             return False
-        if (supplier_amount <= 0 or cell.consumer.goods_amount <= 0) and supplier_eps <= 0 and consumer_eps <= 0:
-            return False
-        if (supplier_amount <= 0 and supplier_eps <= 0) or (consumer_amount <= 0 and consumer_eps <= 0):
-            return False
-        if self.__restrictions and (cell.supplier.id, cell.consumer.id) in self.__restrictions:
-            restriction = self.__restrictions[(cell.supplier.id, cell.consumer.id)]
-            if restriction[0] == '>' and cell.amount <= restriction[1]:
-                return False
-            if restriction[0] == '<' and cell.amount >= restriction[1]:
-                return False
-        return True
-
-    def __calculate_penalty(self, line: npt.NDArray[Root]) -> int:
-        available_cells = [cell for cell in line if self.__is_cell_available(cell)]
-        if not available_cells:
-            return 0
-        if len(available_cells) == 1:
-            return available_cells[0].price
-        sorted_cells = sorted(available_cells, key=lambda x: x.price)
-        return sorted_cells[1].price - sorted_cells[0].price
-
-    def __get_max_penalty_line(self) -> tuple[Optional[str], Optional[int]]:
-        row_penalties = [
-            (i, self.__calculate_penalty(self.__basic_plan[i]))
-            for i in range(self.__suppliers_amount) if self.__basic_plan[i][0].supplier.goods_amount > 0
-                                                       or self.__basic_plan[i][0].supplier.epsilon > 0
-        ]
-        col_penalties = [
-            (j, self.__calculate_penalty(self.__basic_plan[:, j]))
-            for j in range(self.__consumers_amount) if self.__basic_plan[0][j].consumer.goods_amount > 0
-                                                       or self.__basic_plan[0][j].consumer.epsilon > 0
-        ]
-
-        max_row = max(row_penalties, key=lambda x: x[1], default=(None, 0))
-        max_col = max(col_penalties, key=lambda x: x[1], default=(None, 0))
-
-        if max_row[1] >= max_col[1] and max_row[0] is not None:
-            return 'row', max_row[0]
-        if max_col[0] is not None:
-            return 'col', max_col[0]
-        return None, None
-
-    def __get_min_cost_cell(self, line: npt.NDArray[Root]) -> Optional[Root]:
-        available_cells = [cell for cell in line if self.__is_cell_available(cell)]
-        if not available_cells:
-            return None
-        return min(available_cells, key=lambda x: x.price)
-
-    def __fill_conditional_values(self, filled_cells: list[tuple[int, int]]=None
-                                  ) -> tuple[npt.NDArray[np.float16], npt.NDArray[np.float16]]:
-        if not filled_cells:
-            new_field_cells =  list(zip(np.where(self.__solution != '0')[0], np.where(self.__solution != '0')[1]))
-        else:
-            new_field_cells = filled_cells.copy()
-
-        supplier_values = np.zeros(self.__suppliers_amount)
-        supplier_values[0] = 0.0
-        filled_suppliers_indices = [0]
-        consumer_values = np.zeros(self.__consumers_amount)
-        filled_consumers_indices = []
-        counter = 1
-
-        while counter != self.__suppliers_amount + self.__consumers_amount:
-            generator_indices = get_all_indices(new_field_cells)
-            for pair in generator_indices:
-                supplier_idx, consumer_idx = pair
-                if supplier_idx in filled_suppliers_indices:
-                    filled_consumers_indices = np.append(filled_consumers_indices, consumer_idx)
-                    consumer_values[consumer_idx] = (supplier_values[supplier_idx]
-                                                     + np.float16(self.price_matrix[supplier_idx][consumer_idx].price))
-                    new_field_cells.remove(pair)
-                    break
-                if consumer_idx in filled_consumers_indices:
-                    filled_suppliers_indices = np.append(filled_suppliers_indices, supplier_idx)
-                    supplier_values[supplier_idx] = (consumer_values[consumer_idx]
-                                                     - np.float16(self.price_matrix[supplier_idx][consumer_idx].price))
-                    new_field_cells.remove(pair)
-                    break
-            counter += 1
-        return supplier_values, consumer_values
-
-    def __calculate_potentials(self, supplier_values: npt.NDArray[np.float16], consumer_values: npt.NDArray[np.float16],
-                               filled_cells: list[tuple[int, int]]=None
-                               ) -> dict[tuple[npt.NDArray[np.int64], npt.NDArray[np.int64]], np.float16]:
-        if not filled_cells:
-            filled_cells = list(zip(np.where(self.__solution == '0')[0], np.where(self.__solution == '0')[1]))
-        potentials_dict = {}
-        for cell in filled_cells:
-            supplier_idx = cell[0]
-            consumer_idx = cell[1]
-            pseudo_price = consumer_values[consumer_idx] - supplier_values[supplier_idx]
-            potential = self.price_matrix[supplier_idx][consumer_idx].price - pseudo_price
-            potentials_dict[cell] = potential
-        return potentials_dict
-
-    def __find_potential_loop(self, min_potential: tuple[tuple[np.int64], np.float16],
-                              filled_cells: list[tuple[int, int]]=None) -> list[tuple[np.int64]] | None:
-        if not filled_cells:
-            new_filled_cells = (list(zip(np.where(self.__solution != '0')[0], np.where(self.__solution != '0')[1]))
-                            + [min_potential[0]])
-        else:
-            new_filled_cells = filled_cells.copy() + [min_potential[0]]
-        queue = deque()
-        queue.append((min_potential[0][0], min_potential[0][1], [], 'row'))
-        queue.append((min_potential[0][0], min_potential[0][1], [], 'col'))
-        visited = set()
-        while queue:
-            i, j, path, next_dir = queue.popleft()
-            if (i, j) == (min_potential[0][0], min_potential[0][1]) and len(path) >= 3:
-                return path
-
-            if (i, j, next_dir) in visited:
-                continue
-            visited.add((i, j, next_dir))
-
-            if next_dir == 'row':
-                candidates = [cell for cell in new_filled_cells if cell[0] == i and cell != (i, j)]
-                for cell in candidates:
-                    new_path = path + [(i, j)]
-                    queue.append((cell[0], cell[1], new_path, 'col'))
-            elif next_dir == 'col':
-                candidates = [cell for cell in new_filled_cells if cell[1] == j and cell != (i, j)]
-                for cell in candidates:
-                    new_path = path + [(i, j)]
-                    queue.append((cell[0], cell[1], new_path, 'row'))
-        return []
-
-    def __find_min_loop_value(self, loop: list[tuple[np.int64]]) -> tuple[int | float, int]:
-        min_value = (self.__solution[loop[1][0]][loop[1][1]].amount +
-                     (self.__solution[loop[1][0]][loop[1][1]].epsilon * EPSILON_VAL))
-        min_indices = loop[1]
-        for i in range(1, len(loop), 2):
-            root = self.__solution[loop[i][0]][loop[i][1]]
-            cell_amount = root.amount + (root.epsilon * EPSILON_VAL)
-            if cell_amount < min_value:
-                min_value = cell_amount
-                min_indices = loop[i]
-
-        return (self.__solution[min_indices[0]][min_indices[1]].amount,
-                self.__solution[min_indices[0]][min_indices[1]].epsilon)
-
-    def __find_min_loop_capacity_value(self, loop: list[tuple[np.int64]]) -> int | float:
-        min_value = self.__solution[loop[0][0]][loop[0][1]].capacity
-        for i in range(len(loop)):
-            root = self.__solution[loop[i][0]][loop[i][1]]
-            if i % 2 == 0:
-                redistr_val = root.capacity - (root.amount + (root.epsilon * EPSILON_VAL))
-            else:
-                redistr_val = root.amount + (root.epsilon * EPSILON_VAL)
-
-            min_value = min(min_value, redistr_val)
-        return min_value
-
-    def __transportation_redistribution(self, loop: list[tuple[np.int64]], amount: int | float, epsilon: int) -> None:
-        for idx, cell in enumerate(loop):
-            root = self.__solution[cell[0]][cell[1]]
-            if idx % 2 == 0:
-                root.amount += amount
-                root.epsilon += epsilon
-            else:
-                root.amount -= amount
-                root.epsilon -= epsilon
-            root.repr = create_eps_expression(root.epsilon, root.amount)
+        action, value = self.__restrictions[(supplier_id, consumer_id)]
+        return action == '<' and amount >= value
+
+    def __find_min_loop_value(self, loop: list[tuple[int, int]], apex: int) -> tuple[int | float, tuple[int, int]]:
+        # Из блокирующих ячеек берется последняя при обходе цикла от вершины по направлению перераспределения
+        # (правило сильно допустимого дерева), так что вырожденные планы не требуют ε-возмущения
+        amounts = self.__solution.amount
+        positions = [idx for idx in range(apex, len(loop)) if idx % 2 == 1] + list(range(1, apex, 2))
+        leaving_idx = min(positions, key=lambda idx: amounts[loop[idx]])
+        return amounts[loop[leaving_idx]], loop[leaving_idx]
+
+    def __transportation_redistribution(self, loop: list[tuple[int, int]], amount: int | float) -> None:
+        rows, columns = np.array(loop).T
+        signs = np.where(np.arange(len(loop)) % 2 == 0, 1, -1)
+        self.__solution.amount[rows, columns] += signs * amount
+        self.__solution.filled[rows, columns] = True
 
     def __put_additional_restriction(self, supplier_id: int, consumer_id: int, action: str, amount: int | float):
-        root = self.price_matrix[supplier_id][consumer_id]
         if action == '>':
-            root.supplier.real_amount -= amount
-            root.supplier.goods_amount -= amount
-            root.consumer.real_amount -= amount
-            root.consumer.goods_amount -= amount
+            self.__real_supply[supplier_id] -= amount
+            self.__supply[supplier_id] -= amount
+            self.__real_demand[consumer_id] -= amount
+            self.__demand[consumer_id] -= amount
         else:
-            prev_amount = self.__suppliers[supplier_id].real_amount
-            self.__suppliers[supplier_id].real_amount = amount
-            self.__suppliers[supplier_id].goods_amount = amount
-
-            self.__suppliers_amount += 1
-            new_supplier = Supplier(prev_amount - amount, self.__suppliers_amount - 1)
-            self.__suppliers = np.append(self.__suppliers, new_supplier)
-            new_line = np.empty((1, self.__consumers_amount), dtype=Root)
+            prev_amount = self.__real_supply[supplier_id]
+            self.__real_supply[supplier_id] = amount
+            self.__supply[supplier_id] = amount
 
-            for i in range(0, self.__consumers_amount):
-                new_line[0][i] = Root(0 if i != consumer_id else M_VAL, new_supplier, self.consumers[i])
-            self.__price_matrix = np.concatenate((self.price_matrix, new_line), axis=0)
+            prices = np.zeros(self.__consumers_amount, dtype=self.__dtype)
+            prices[consumer_id] = M_VAL
+            self.__append_supplier(prev_amount - amount, prices)
 
     def __remove_additional_restriction(self, supplier_id: int, consumer_id: int, action: str, amount: int | float):
-        root = self.price_matrix[supplier_id][consumer_id]
         if action == '>':
-            root.supplier.real_amount += amount
-            root.supplier.goods_amount += amount
-            root.consumer.real_amount += amount
-            root.consumer.goods_amount += amount
-
-            solution_root = self.__solution[supplier_id][consumer_id]
-            solution_root.amount += amount
-            solution_root.repr = create_eps_expression(solution_root.epsilon, solution_root.amount)
+            self.__real_supply[supplier_id] += amount
+            self.__supply[supplier_id] += amount
+            self.__real_demand[consumer_id] += amount
+            self.__demand[consumer_id] += amount
+
+            self.__solution.amount[supplier_id, consumer_id] += amount
+            self.__solution.filled[supplier_id, consumer_id] = True
         else:
-            final_amount = self.__suppliers[supplier_id].real_amount + self.__suppliers[-1].real_amount
-            self.suppliers[supplier_id].real_amount = final_amount
-            self.suppliers[supplier_id].goods_amount = final_amount
-
-            for i in range(0, self.__consumers_amount):
-                solution_root = self.__solution[supplier_id][i]
-                solution_root.amount += self.__solution[-1][i].amount
-                solution_root.epsilon += self.__solution[-1][i].epsilon
-                solution_root.repr = create_eps_expression(solution_root.epsilon, solution_root.amount)
-
-            self.__suppliers_amount -= 1
-            self.__suppliers = np.delete(self.suppliers, -1)
-            self.__solution = self.__solution = np.delete(self.__solution, -1, axis=0)
-
-    def __extend_transport_matrix(self) -> None:
-        consumers, suppliers = self.__get_disbalanced_participants()
-        self.__consumers_amount += 1
-        new_consumer = Consumer(sum(item[0] for item in consumers.values()), self.__consumers_amount - 1,
-                                sum(item[1] for item in consumers.values()))
-        self.__consumers = np.append(self.__consumers, new_consumer)
-        new_consumer_line = np.empty((self.__suppliers_amount, 1), dtype=Root)
-        for i in range(self.__suppliers_amount):
-            new_consumer_line[i][0] = Root(M_VAL, self.suppliers[i], new_consumer,
-                                           amount=consumers[i][0] if i in consumers else 0,
-                                           epsilon=consumers[i][1] if i in consumers else 0,
-                                           representation=str(consumers[i][0]) if i in consumers else '0',
-                                           capacity=M_VAL)
-        self.__price_matrix = np.concatenate((self.__price_matrix, new_consumer_line), axis=1)
+            final_amount = self.__real_supply[supplier_id] + self.__real_supply[-1]
+            self.__real_supply[supplier_id] = final_amount
+            self.__supply[supplier_id] = final_amount
 
-        self.__suppliers_amount += 1
-        new_supplier = Supplier(sum(item[0] for item in suppliers.values()), self.__suppliers_amount - 1,
-                                sum(item[1] for item in suppliers.values()))
-        self.__suppliers = np.append(self.__suppliers, new_supplier)
-        new_supplier_line = np.empty((1, self.__consumers_amount), dtype=Root)
-        for i in range(self.__consumers_amount):
-            new_supplier_line[0][i] = Root(M_VAL if i != self.__consumers_amount - 1 else 0,
-                                           new_supplier, self.consumers[i],
-                                           amount=suppliers[i][0] if i in suppliers else 0,
-                                           epsilon=suppliers[i][1] if i in suppliers else 0,
-                                           representation=str(suppliers[i][0]) if i in suppliers else '0',
-                                           capacity=M_VAL)
-        self.__price_matrix = np.concatenate((self.price_matrix, new_supplier_line), axis=0)
-
-        self.__basic_plan = np.concatenate((self.__basic_plan, new_consumer_line), axis=1)
-        self.__basic_plan = np.concatenate((self.__basic_plan, new_supplier_line), axis=0)
-
-    def __collapse_transport_matrix(self):
-        self.__solution = self.__solution[:-1, :-1]
-        self.__price_matrix = self.price_matrix[:-1, :-1]
-        self.__suppliers = self.suppliers[:-1]
-        self.__consumers = self.consumers[:-1]
+            self.__solution.amount[supplier_id] += self.__solution.amount[-1]
+            self.__solution.filled[supplier_id] |= self.__solution.filled[-1]
+
+            self.__remove_last_supplier()
+            self.__solution.shrink(self.__suppliers_amount, self.__consumers_amount)
+
+    def __remove_last_supplier(self) -> None:
         self.__suppliers_amount -= 1
-        self.__consumers_amount -= 1
+        self.__supply = self.__supply[:-1]
+        self.__real_supply = self.__real_supply[:-1]
+        self.__prices = self.__prices[:-1]
+        if self.__capacities is not None:
+            self.__capacities = self.__capacities[:-1]
+
+    @staticmethod
+    def __create_transition_matrix(matrix: Plan) -> list[dict[str, int | float]]:
+        supplier_indices, consumer_indices = np.nonzero(matrix.filled)
+        return [
+            {
+                'supplier_id': supplier_idx,
+                'consumer_id': consumer_idx,
+                'amount': amount,
+                'epsilon': 0
+            }
+            for supplier_idx, consumer_idx, amount in zip(
+                supplier_indices.tolist(), consumer_indices.tolist(),
+                matrix.amount[supplier_indices, consumer_indices].tolist())
+        ]
 
-    def __solve_extended_transport_matrix(self):
-        self.__solution = np.zeros((self.__suppliers_amount, self.__consumers_amount), dtype=Root)
+    def __build_participants(self) -> tuple[npt.NDArray[Supplier], npt.NDArray[Consumer]]:
+        suppliers = np.empty(self.__suppliers_amount, dtype=object)
+        for idx in range(self.__suppliers_amount):
+            supplier = Supplier(self.__real_supply[idx], idx)
+            supplier.goods_amount = float(self.__supply[idx])
+            suppliers[idx] = supplier
+
+        consumers = np.empty(self.__consumers_amount, dtype=object)
+        for idx in range(self.__consumers_amount):
+            consumer = Consumer(self.__real_demand[idx], idx)
+            consumer.goods_amount = float(self.__demand[idx])
+            consumers[idx] = consumer
+        return suppliers, consumers
+
+    def __build_roots(self, plan: Optional[Plan] = None) -> npt.NDArray[Root]:
+        suppliers, consumers = self.__build_participants()
+        roots = np.empty((self.__suppliers_amount, self.__consumers_amount), dtype=object)
         for supplier_id in range(self.__suppliers_amount):
             for consumer_id in range(self.__consumers_amount):
-                self.__solution[supplier_id][consumer_id] = copy.copy(self.latest_basic_plan[supplier_id][consumer_id])
-
-        used_plans = []
-        while True:
-            basic_plan_cells = []
-            reserve_cells = []
-            for supplier_row in self.__solution:
-                for root in supplier_row:
-                    if 0 < root.amount < root.capacity:
-                        basic_plan_cells.append(root)
-                    elif root.amount in (0, root.capacity):
-                        reserve_cells.append(root)
-            acyclic_cells, other_cells = find_acyclic_plan(basic_plan_cells, reserve_cells, self.__suppliers_amount,
-                                                           self.__consumers_amount,  used_plans)
-
-            supplier_values, consumer_values = self.__fill_conditional_values(acyclic_cells)
-
-            potentials = self.__calculate_potentials(supplier_values, consumer_values, other_cells)
-            d_values = np.array([val for key, val in potentials.items() if key[2] == 'd'])
-            c_values = np.array([val for key, val in potentials.items() if key[2] == 'c'])
-
-            if np.any(d_values > 0) or np.any(c_values < 0):
-                if np.any(c_values < 0):
-                    min_potential = sorted([(key, val) for key, val in potentials.items() if key[2] == 'c'],
-                                           key=lambda x: x[1])[0]
-                else:
-                    min_potential = sorted([(key, val) for key, val in potentials.items() if key[2] == 'd'],
-                                           key=lambda x: x[1])[0]
-
-                loop = self.__find_potential_loop(min_potential, acyclic_cells)
-                if not loop:
-                    continue
-                amount = self.__find_min_loop_capacity_value(loop)
-
-                if amount != 0:
-                    self.__transportation_redistribution(loop, int(amount), epsilon=0)
-            else:
-                break
-
-            consumer_exp = create_eps_expression(self.consumers[-1].real_epsilon, self.consumers[-1].real_amount)
-            supplier_epx = create_eps_expression(self.suppliers[-1].real_epsilon, self.suppliers[-1].real_amount)
-            if self.__solution[-1][-1].repr == consumer_exp == supplier_epx:
-                self.__collapse_transport_matrix()
-
-    def __create_transition_matrix(self, matrix: npt.NDArray[Root]) -> list[dict[str, int | float]]:
-        transition_roots = []
-        for supplier_idx, line in enumerate(matrix):
-            for consumer_idx, item in enumerate(line):
-                if item.repr != '0':
-                    transition_root = {
-                        'supplier_id': supplier_idx,
-                        'consumer_id': consumer_idx,
-                        'amount': item.amount,
-                        'epsilon': item.epsilon
-                    }
-                    transition_roots.append(transition_root)
-        return transition_roots
+                capacity = self.__capacities[supplier_id, consumer_id] if self.__capacities is not None else None
+                root = Root(self.__prices[supplier_id, consumer_id], suppliers[supplier_id], consumers[consumer_id],
+                            capacity=capacity)
+                if (plan is not None and supplier_id < plan.filled.shape[0] and consumer_id < plan.filled.shape[1]
+                        and plan.filled[supplier_id, consumer_id]):
+                    root.amount = float(plan.amount[supplier_id, consumer_id])
+                    root.repr = str(root.amount)
+                roots[supplier_id, consumer_id] = root
+        return roots
 
     def get_optimal_solution_price(self) -> int | float:
-        price = 0
-        for i in range(len(self.__solution)):
-            for root in self.__solution[i]:
-                price += root.amount * root.price
-        return price
+        return (self.__solution.amount * self.__prices).sum().item()
 
     def create_basic_plan(self, mode: int=1) -> tuple[list[dict[str, int | float]], int | float]:
         if not self.check_table_balance():
-            self.__balance_table()
-
-        if self.__restrictions:
-            for (supplier_id, consumer_id), (action, amount) in self.__restrictions.items():
-                self.__put_additional_restriction(supplier_id, consumer_id, action, amount)
-
-        if mode == 1:
-            plan, cost = self.__north_western_method()
-        elif mode == 2:
-            plan, cost = self.__minimum_cost_method()
-        else:
-            plan, cost = self.__vogel_method()
-
-        self.pprint_res(plan)
+            with self.__stats.phase('balancing'):
+                self.__balance_table()
+
+        with self.__stats.phase('basic_plan'):
+            if self.__restrictions:
+                for (supplier_id, consumer_id), (action, amount) in self.__restrictions.items():
+                    self.__put_additional_restriction(supplier_id, consumer_id, action, amount)
+
+            if mode == 1:
+                plan, cost = self.__north_western_method()
+            elif mode == 2:
+                plan, cost = self.__minimum_cost_method()
+            else:
+                plan, cost = self.__vogel_method()
         transition_matrix = self.__create_transition_matrix(plan)
         self.__restore_price_matrix_values()
         return transition_matrix, cost
 
-    def create_optimal_plan(self) -> Optional[tuple[list[dict[str, int | float]], int | float]]:
-        self.__solution = np.zeros((self.__suppliers_amount, self.__consumers_amount), dtype=Root)
-        for supplier_id in range(self.__suppliers_amount):
-            for consumer_id in range(self.__consumers_amount):
-                self.__solution[supplier_id][consumer_id] = copy.copy(self.latest_basic_plan[supplier_id][consumer_id])
-
+    def __run_primal_simplex(self, tree: SpanningTree, rule: PivotRule) -> None:
+        stats = self.__stats
+        with stats.phase('pricing'):
+            entering_cell = rule.select(tree.supplier_potentials, tree.consumer_potentials, self.__solution.filled)
+        while entering_cell is not None:
+            self.__check_stop()
+            with stats.phase('loop_search'):
+                loop, apex = tree.cycle(entering_cell)
+                amount, leaving_cell = self.__find_min_loop_value(loop, apex)
+            with stats.phase('redistribution'):
+                self.__transportation_redistribution(loop, amount)
+                self.__solution.filled[leaving_cell] = False
+            with stats.phase('potentials'):
+                tree.pivot(entering_cell, leaving_cell)
+            self.__iterations += 1
+            stats.count('iterations')
+            if amount <= EPSILON_VAL:
+                stats.count('degenerate_pivots')
+            with stats.phase('pricing'):
+                entering_cell = rule.select(tree.supplier_potentials, tree.consumer_potentials,
+                                            self.__solution.filled)
+
+    def __run_dual_simplex(self, tree: SpanningTree) -> None:
+        # Базисная ячейка с отрицательным объемом выводится из базиса, а входящей становится ячейка с минимальной
+        # оценкой среди соединяющих две части дерева в направлении, которое увеличивает выводимый объем
         while True:
-            supplier_values, consumer_values = self.__fill_conditional_values()
-            potentials = self.__calculate_potentials(supplier_values, consumer_values)
-            values = np.array([*potentials.values()])
-            if np.any(values < 0):
-                min_potential = sorted(potentials.items(), key=lambda x: x[1])[0]
-                loop = self.__find_potential_loop(min_potential)
-                if not loop:
-                    return None
-                amount, epsilon = self.__find_min_loop_value(loop)
-                self.__transportation_redistribution(loop, amount, epsilon)
+            self.__check_stop()
+            amounts = np.where(self.__solution.filled, self.__solution.amount, 0)
+            flat_idx = int(np.argmin(amounts))
+            if amounts.flat[flat_idx] >= -EPSILON_VAL:
+                return
+            leaving_cell = divmod(flat_idx, self.__consumers_amount)
+            nodes = tree.subtree(leaving_cell)
+            subtree_suppliers, subtree_consumers = nodes[:self.__suppliers_amount], nodes[self.__suppliers_amount:]
+            if subtree_consumers[leaving_cell[1]]:
+                crossing = subtree_suppliers[:, None] & ~subtree_consumers[None, :]
             else:
-                break
+                crossing = ~subtree_suppliers[:, None] & subtree_consumers[None, :]
+            costs = np.where(crossing & ~self.__solution.filled,
+                             reduced_costs(self.__prices, tree.supplier_potentials, tree.consumer_potentials), np.inf)
+            supplier_idx, consumer_idx = divmod(int(np.argmin(costs)), self.__consumers_amount)
+
+            loop, _ = tree.cycle((supplier_idx, consumer_idx))
+            self.__transportation_redistribution(loop, -amounts[leaving_cell])
+            self.__solution.amount[leaving_cell] = 0
+            self.__solution.filled[leaving_cell] = False
+            tree.pivot((supplier_idx, consumer_idx), leaving_cell)
+            self.__iterations += 1
+            self.__stats.count('dual_iterations')
+
+    def __set_tree_flows(self, tree: SpanningTree, supply: npt.NDArray[np.float64],
+                         demand: npt.NDArray[np.float64]) -> bool:
+        cells, amounts = tree.flows(supply, demand)
+        self.__solution = Plan(self.__suppliers_amount, self.__consumers_amount, self.__dtype)
+        supplier_ids, consumer_ids = zip(*cells)
+        self.__solution.amount[supplier_ids, consumer_ids] = amounts
+        self.__solution.filled[supplier_ids, consumer_ids] = True
+        return min(amounts) >= -EPSILON_VAL
+
+    def __store_network_solution(self) -> tuple[list[dict[str, int | float]], int | float]:
+        self.__solution = Plan(self.__suppliers_amount, self.__consumers_amount, self.__dtype)
+        iterations = self.__network.iterations
+        with self.__stats.phase('network_simplex'):
+            amounts = self.__network.solve(self.__stop_condition)
+        if self.__dtype == np.int64:
+            # Для целых данных оптимальные потоки сетевого симплекс-метода целые, погрешность float64 отбрасывается
+            amounts = np.rint(amounts)
+        self.__solution.amount = amounts.astype(self.__dtype).reshape(self.__suppliers_amount, self.__consumers_amount)
+        self.__iterations = self.__network.iterations - iterations
+        self.__stats.count('network_iterations', self.__iterations)
+        self.__solution.filled = self.__solution.amount > 0
+
+        price = self.get_optimal_solution_price()
+        transition_matrix = self.__create_transition_matrix(self.__solution)
+        return transition_matrix, price
+
+    def create_optimal_plan(self, pivot_rule: str='dantzig', block_size: Optional[int]=None
+                            ) -> Optional[tuple[list[dict[str, int | float]], int | float]]:
+        rule = PivotRule(self.__prices, pivot_rule, block_size)
+        self.__iterations = 0
+        self.__solution = copy.copy(self.__basic_plan)
+        with self.__stats.phase('potentials'):
+            tree = SpanningTree(self.__suppliers_amount, self.__consumers_amount, self.__prices,
+                                list(zip(*np.nonzero(self.__solution.filled))))
+        for cell in tree.added_cells:
+            self.__solution.filled[cell] = True
+        self.__stats.count('added_cells', len(tree.added_cells))
+
+        self.__run_primal_simplex(tree, rule)
         for (supplier_id, consumer_id), (action, amount) in self.__restrictions.items():
             self.__remove_additional_restriction(supplier_id, consumer_id, action, amount)
 
@@ -792,29 +742,69 @@ class TransportTable:
         return self.__create_transition_matrix(self.__solution), price
 
     def solve_capacity_plan(self) -> Optional[tuple[list[dict[str, int | float]], int | float]]:
-        self.__minimum_cost_method()
-
-        if self.__check_balance_equations() is False:
-            self.__extend_transport_matrix()
-            self.__solve_extended_transport_matrix()
+        if not self.check_table_balance():
+            with self.__stats.phase('balancing'):
+                self.__balance_table()
+
+        arc_suppliers, arc_consumers = np.divmod(np.arange(self.__prices.size), self.__consumers_amount)
+        self.__network = NetworkSimplex(self.__supply, self.__demand, arc_suppliers, arc_consumers,
+                                        self.__prices.ravel(), self.__capacities.ravel())
+        return self.__store_network_solution()
+
+    def resolve(self, supply: Optional[dict[int, int | float]] = None, demand: Optional[dict[int, int | float]] = None,
+                prices: Optional[dict[tuple[int, int], int | float]] = None,
+                capacities: Optional[dict[tuple[int, int], int | float]] = None,
+                basis: Optional[list[dict[str, int | float]]] = None, mode: int=1, pivot_rule: str='dantzig',
+                block_size: Optional[int]=None) -> tuple[list[dict[str, int | float]], int | float]:
+        self.__iterations = 0
+        if self.__capacities is not None:
+            self.__apply_changes(supply, demand, prices, capacities)
+            if self.__network is None or supply or demand or capacities:
+                return self.solve_capacity_plan()
+            self.__network.reprice(self.__prices.ravel())
+            return self.__store_network_solution()
+
+        if basis is not None:
+            cells = [(int(root['supplier_id']), int(root['consumer_id'])) for root in basis]
         else:
-            self.create_optimal_plan()
+            cells = list(zip(*np.nonzero(self.__solution.filled)))
+        with self.__stats.phase('balancing'):
+            self.__rebalance_table()
+        previous_supply, previous_demand = self.__real_supply.copy(), self.__real_demand.copy()
+        self.__apply_changes(supply, demand, prices, capacities)
+        cells = [(supplier_id, consumer_id) for supplier_id, consumer_id in cells
+                 if supplier_id < self.__suppliers_amount and consumer_id < self.__consumers_amount]
+
+        rule = PivotRule(self.__prices, pivot_rule, block_size)
+        with self.__stats.phase('potentials'):
+            tree = SpanningTree(self.__suppliers_amount, self.__consumers_amount, self.__prices, cells)
+        previous_supply = np.pad(previous_supply, (0, self.__suppliers_amount - len(previous_supply)))
+        previous_demand = np.pad(previous_demand, (0, self.__consumers_amount - len(previous_demand)))
+        # Сначала базис доводится до оптимальности по новым ценам на прежних объемах, затем двойственным
+        # симплекс-методом восстанавливается допустимость для новых объемов
+        if self.__restrictions or not cells or not self.__set_tree_flows(tree, previous_supply, previous_demand):
+            self.create_basic_plan(mode)
+            return self.create_optimal_plan(pivot_rule, block_size)
+        self.__run_primal_simplex(tree, rule)
+        self.__set_tree_flows(tree, self.__supply, self.__demand)
+        with self.__stats.phase('dual_simplex'):
+            self.__run_dual_simplex(tree)
+        self.__run_primal_simplex(tree, rule)
 
         price = self.get_optimal_solution_price()
-        transition_matrix = self.__create_transition_matrix(self.__solution)
-        return transition_matrix, price
+        return self.__create_transition_matrix(self.__solution), price
 
     @property
     def price_matrix(self):
-        return self.__price_matrix
+        return self.__build_roots()
 
     @property
     def consumers(self):
-        return self.__consumers
+        return self.__build_participants()[1]
 
     @property
     def suppliers(self):
-        return self.__suppliers
+        return self.__build_participants()[0]
 
     @property
     def amount_suppliers(self):
@@ -826,12 +816,32 @@ class TransportTable:
 
     @property
     def latest_basic_plan(self):
-        return self.__basic_plan
+        return self.__build_roots(self.__basic_plan)
 
     @property
     def latest_optimal_plan(self):
-        return self.__solution
+        return self.__build_roots(self.__solution)
+
+    @property
+    def fingerprint(self):
+        return self.__fingerprint
+
+    @property
+    def iterations(self):
+        return self.__iterations
+
+    @property
+    def stats(self):
+        return self.__stats.as_dict()
 
     @property
     def has_capacities(self):
         return self.__capacities is not None
+
+    @property
+    def stop_condition(self) -> Optional[Callable[[], bool]]:
+        return self.__stop_condition
+
+    @stop_condition.setter
+    def stop_condition(self, stop_condition: Optional[Callable[[], bool]]) -> None:
+        self.__stop_condition = stop_condition
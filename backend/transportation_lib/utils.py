@@ -1,4 +1,6 @@
+import heapq
 import random
+from typing import Optional
 import numpy as np
 from numpy import typing as npt
 
@@ -6,52 +8,119 @@ from numpy import typing as npt
 MAIN_ANSWER = 42
 EPSILON_VAL = 1e-6
 M_VAL = 1e+12
-
-
-class UnionFind:
-    def __init__(self, size):
-        self.parent = list(range(size))
-        self.rank = [0] * size
-
-    def find(self, x):
-        if self.parent[x] != x:
-            self.parent[x] = self.find(self.parent[x])
-        return self.parent[x]
-
-    def union(self, x, y):
-        px = self.find(x)
-        py = self.find(y)
-        if px == py:
-            return
-        if self.rank[px] < self.rank[py]:
-            px, py = py, px
-        self.parent[py] = px
-        if self.rank[px] == self.rank[py]:
-            self.rank[px] += 1
-
-
-def create_eps_expression(eps: int, goods_amount: int | float) -> str:
-    if eps == 0:
-        return str(goods_amount)
-    epsilon = '\u03B5'
-    sign = '+'
-    if eps < 0:
-        sign = '-'
-    if goods_amount == 0:
-        return f'{sign if sign == "-" else ""}{eps}{epsilon}'
-    return str(goods_amount) if eps == 0 else f'{goods_amount}{sign}{abs(eps) if abs(eps) != 1 else ""}{epsilon}'
-
-
-def root_validation(consumer_amount: int | float, supplier_amount: int | float, consumer_epsilon: int,
-                    supplier_epsilon: int, is_capacity_full: bool) -> bool:
-    main_expression = consumer_amount != 0 and supplier_amount != 0
-    epsilon_expression = supplier_epsilon != 0 and consumer_epsilon != 0
-    mixed_consumer_expression = consumer_amount != 0 and supplier_epsilon != 0
-    mixed_supplier_expression = supplier_amount != 0 and consumer_epsilon != 0
-    if ((main_expression or mixed_consumer_expression or mixed_supplier_expression or epsilon_expression) and
-            not is_capacity_full):
-        return True
-    return False
+# Граница для произведений объемов на цены в целочисленном режиме (с запасом от предела int64)
+INT_LIMIT = 2 ** 62
+
+
+class LinePenalties:
+    def __init__(self, prices: npt.NDArray[np.float64]) -> None:
+        lines_amount = prices.shape[0]
+        self.__prices = prices.tolist()
+        # Для каждой строки (столбца) ячейки упорядочены по стоимости один раз, далее только пропускаются
+        self.__order = np.argsort(prices, axis=1, kind='stable').tolist()
+        self.__start = [0] * lines_amount
+        self.__version = [0] * lines_amount
+        self.__heap = []
+        self.first = np.full(lines_amount, -1, dtype=np.int64)
+        self.second = np.full(lines_amount, -1, dtype=np.int64)
+
+    def __next_available(self, line: int, position: int, cross_alive: list[bool], blocked: set[tuple[int, int]]) -> int:
+        order = self.__order[line]
+        while position < len(order) and (not cross_alive[order[position]] or (line, order[position]) in blocked):
+            position += 1
+        return position
+
+    def refresh(self, line: int, cross_alive: list[bool], blocked: set[tuple[int, int]]) -> None:
+        order = self.__order[line]
+        first = self.__next_available(line, self.__start[line], cross_alive, blocked)
+        second = self.__next_available(line, first + 1, cross_alive, blocked)
+        if second < len(order) and second - first > 1:
+            # Недоступные ячейки между двумя дешевейшими больше не понадобятся: сдвигаем первую к второй
+            order[second - 1] = order[first]
+            first = second - 1
+        self.__start[line] = first
+
+        prices = self.__prices[line]
+        if first >= len(order):
+            self.first[line], self.second[line] = -1, -1
+            penalty = 0
+        elif second >= len(order):
+            self.first[line], self.second[line] = order[first], -1
+            penalty = prices[order[first]]
+        else:
+            self.first[line], self.second[line] = order[first], order[second]
+            penalty = prices[order[second]] - prices[order[first]]
+
+        self.__version[line] += 1
+        heapq.heappush(self.__heap, (-penalty, line, self.__version[line]))
+
+    def discard(self, line: int) -> None:
+        self.__version[line] += 1
+        self.first[line], self.second[line] = -1, -1
+
+    def best(self) -> tuple[Optional[int], int | float]:
+        while self.__heap:
+            penalty, line, version = self.__heap[0]
+            if version == self.__version[line]:
+                return line, -penalty
+            heapq.heappop(self.__heap)
+        return None, 0
+
+    def cheapest(self, line: int) -> Optional[int]:
+        return int(self.first[line]) if self.first[line] != -1 else None
+
+    def lines_using(self, cross: int) -> list[int]:
+        return np.flatnonzero((self.first == cross) | (self.second == cross)).tolist()
+
+
+class VogelLines:
+    def __init__(self, prices: npt.NDArray[np.float64], alive_rows: list[bool], alive_columns: list[bool],
+                 blocked_cells: list[tuple[int, int]]) -> None:
+        self.alive_rows = alive_rows
+        self.alive_columns = alive_columns
+        self.__blocked_rows = set()
+        self.__blocked_columns = set()
+        for supplier_id, consumer_id in blocked_cells:
+            self.block(supplier_id, consumer_id)
+
+        self.__rows = LinePenalties(prices)
+        self.__columns = LinePenalties(prices.T)
+        for supplier_id in np.flatnonzero(alive_rows).tolist():
+            self.__rows.refresh(supplier_id, alive_columns, self.__blocked_rows)
+        for consumer_id in np.flatnonzero(alive_columns).tolist():
+            self.__columns.refresh(consumer_id, alive_rows, self.__blocked_columns)
+
+    def block(self, supplier_id: int, consumer_id: int) -> None:
+        self.__blocked_rows.add((supplier_id, consumer_id))
+        self.__blocked_columns.add((consumer_id, supplier_id))
+
+    def select(self) -> Optional[tuple[int, int]]:
+        row, row_penalty = self.__rows.best()
+        column, column_penalty = self.__columns.best()
+        if row is not None and row_penalty >= column_penalty:
+            cell = (row, self.__rows.cheapest(row))
+        elif column is not None:
+            cell = (self.__columns.cheapest(column), column)
+        else:
+            return None
+        return cell if None not in cell else None
+
+    def update(self, supplier_id: int, consumer_id: int, is_row_alive: bool, is_column_alive: bool) -> None:
+        # Пересчитываются только линии, затронутые распределением
+        self.alive_rows[supplier_id] = is_row_alive
+        self.alive_columns[consumer_id] = is_column_alive
+        if not is_row_alive:
+            self.__rows.discard(supplier_id)
+            for column in self.__columns.lines_using(supplier_id):
+                self.__columns.refresh(column, self.alive_rows, self.__blocked_columns)
+        if not is_column_alive:
+            self.__columns.discard(consumer_id)
+            for row in self.__rows.lines_using(consumer_id):
+                self.__rows.refresh(row, self.alive_columns, self.__blocked_rows)
+        if is_row_alive:
+            self.__rows.refresh(supplier_id, self.alive_columns, self.__blocked_rows)
+        if is_column_alive:
+            self.__columns.refresh(consumer_id, self.alive_rows, self.__blocked_columns)
 
 
 def generate_table(suppliers_amount: int, consumers_amount: int, balanced: bool=True):
@@ -74,67 +143,5 @@ def generate_table(suppliers_amount: int, consumers_amount: int, balanced: bool=
     return suppliers, consumers, price_matrix
 
 
-def find_line_penalty(line: npt.NDArray, basic_plan: npt.NDArray[npt.NDArray]) -> int | float:
-
-    filtered_array = np.fromiter((root for root in line
-                                  if root_validation(root.consumer.goods_amount, root.supplier.goods_amount,
-                                                     root.consumer.epsilon, root.supplier.epsilon,
-                                                     basic_plan[root.supplier.id][root.consumer.id].amount
-                                                     == root.capacity)), dtype=line.dtype)
-    if len(filtered_array) == 0:
-        return 0
-    filtered_array.sort()
-    if len(filtered_array) == 1:
-        return M_VAL
-    if len(filtered_array) > 1:
-        return abs(filtered_array[0].price - filtered_array[1].price)
-    return filtered_array[0].price
-
-
-def get_min_line_element(line: npt.NDArray, basic_plan: npt.NDArray[npt.NDArray]) -> tuple[int | None, int | None]:
-    copied_matrix = line.copy()
-    copied_matrix.sort()
-    for root in copied_matrix:
-        is_capacity_full = basic_plan[root.supplier.id][root.consumer.id].amount == root.capacity
-        if root_validation(root.consumer.goods_amount, root.supplier.goods_amount, root.consumer.epsilon,
-                           root.supplier.epsilon, is_capacity_full):
-            return root.supplier.id, root.consumer.id
-    return None, None
-
-
 def get_all_indices(filed_indices):
     yield from filed_indices
-
-
-def find_acyclic_plan(basic_plan_cells, reserve_cells, m, n, used_plans):
-    reserve_cells_copy = reserve_cells.copy()
-
-    # Инициализация Union-Find для m поставщиков и n потребителей
-    uf = UnionFind(m + n)
-
-    # Копируем все элементы из basic_plan_cells в результат
-    selected = [(root.supplier.id, root.consumer.id) for root in basic_plan_cells]
-    unselected = []
-
-    # Учитываем компоненты связности от basic_plan_cells
-    for root in basic_plan_cells:
-        uf.union(root.supplier.id - 1, m + root.consumer.id  - 1)
-
-    while len(selected) !=  m + n - 1:
-        root = random.choice(reserve_cells_copy)
-        if uf.find(root.supplier.id - 1) != uf.find(m + root.consumer.id - 1):
-            selected.append((root.supplier.id, root.consumer.id))
-            uf.union(root.supplier.id - 1, m + root.consumer.id - 1)
-
-    selected.sort()
-    if selected in used_plans:
-        find_acyclic_plan(basic_plan_cells, reserve_cells, m, n, used_plans)
-    used_plans.append(selected)
-
-    for root in reserve_cells_copy:
-        if root.amount == 0:
-            unselected.append((root.supplier.id, root.consumer.id, 'c'))
-        elif root.amount == root.capacity:
-            unselected.append((root.supplier.id, root.consumer.id, 'd'))
-
-    return selected, unselected
@@ -1,49 +1,118 @@
+import csv
 import hashlib
-from typing import Type
-from sqlalchemy.orm import Session
+import io
+from typing import Any, Optional, Type
+from sqlalchemy import insert
+from sqlalchemy.orm import Session, aliased
 import numpy as np
+import numpy.typing as npt
 from backend import models, schemas
 from backend.models import SolutionRoot
+from backend.transportation_lib.route_table import RouteTable
 from backend.transportation_lib.transport_table import TransportTable
 
 
 def get_transport_table_info(db: Session, table: Type[models.TransportTable]) -> TransportTable:
+    if table.matrix is not None:
+        return get_matrix_table_info(table.matrix)
+
+    # Таблица читается двумя запросами: участники и ячейки вместе с номерами строк и столбцов. Фиктивные линии,
+    # добавленные при сохранении решений, в задачу не входят
+    supplier, consumer = aliased(models.Participant), aliased(models.Participant)
     with db as session:
-        consumers = [p.goods_amount for p in session.query(models.Participant)
-        .filter_by(transport_table_id=table.id, is_supplier=False)
-        .order_by(models.Participant.line_id)]
+        lines = {True: [], False: []}
+        for is_supplier, goods_amount in session.query(
+                models.Participant.is_supplier, models.Participant.goods_amount
+        ).filter_by(transport_table_id=table.id, is_dummy=False).order_by(models.Participant.line_id):
+            lines[is_supplier].append(goods_amount)
+
+        roots = session.query(
+            supplier.line_id, consumer.line_id, models.Root.price, models.Root.capacity, models.Root.restriction
+        ).join(supplier, models.Root.supplier_id == supplier.id).join(
+            consumer, models.Root.consumer_id == consumer.id
+        ).filter(
+            models.Root.transport_table_id == table.id, supplier.is_dummy.is_(False), consumer.is_dummy.is_(False)
+        ).all()
+
+    suppliers, consumers = lines[True], lines[False]
+    price_matrix = np.zeros((len(suppliers), len(consumers)), dtype=np.float64)
+    capacities = None
+    restrictions = {}
+    if roots:
+        supplier_ids, consumer_ids, prices, cell_capacities, cell_restrictions = zip(*roots)
+        price_matrix[supplier_ids, consumer_ids] = prices
+        if any(cell_capacities):
+            capacities = np.zeros_like(price_matrix)
+            capacities[supplier_ids, consumer_ids] = [capacity or 0 for capacity in cell_capacities]
+        restrictions = {(supplier_id, consumer_id): (restriction[0], int(restriction[1:]))
+                        for supplier_id, consumer_id, restriction in zip(supplier_ids, consumer_ids, cell_restrictions)
+                        if restriction}
+
+    return TransportTable(suppliers, consumers, price_matrix, restrictions, capacities)
+
+
+def pack_array(values: list | npt.NDArray) -> bytes:
+    array = np.asarray(values, dtype=np.float64)
+    # Целые значения сохраняются в int32, если помещаются: вдвое компактнее float64
+    if array.size and np.array_equal(array, np.trunc(array)) and np.abs(array).max() < 2 ** 31:
+        array = array.astype(np.int32)
+    buffer = io.BytesIO()
+    np.save(buffer, np.ascontiguousarray(array), allow_pickle=False)
+    return buffer.getvalue()
+
+
+def unpack_array(blob: bytes) -> npt.NDArray:
+    # Разбирается только заголовок NPY, данные читаются без копирования прямо из буфера
+    buffer = io.BytesIO(blob)
+    version = np.lib.format.read_magic(buffer)
+    if version == (1, 0):
+        shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(buffer)
+    else:
+        shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(buffer)
+    array = np.frombuffer(blob, dtype=dtype, offset=buffer.tell())
+    return array.reshape(shape, order='F' if fortran_order else 'C')
 
-        suppliers = [p.goods_amount for p in session.query(models.Participant)
-        .filter_by(transport_table_id=table.id, is_supplier=True)
-        .order_by(models.Participant.line_id)]
 
-        price_matrix = np.zeros((len(suppliers), len(consumers)), dtype=np.float16)
-        capacities = np.zeros((len(suppliers), len(consumers)), dtype=np.float16) \
-            if list(table.roots)[0].capacity else None
+def get_restrictions(restrictions: Optional[dict[str, str]]) -> dict[tuple[int, int], tuple[str, int]]:
+    cell_restrictions = {}
+    for k, v in (restrictions or {}).items():
+        row_id, col_id = map(int, k.split(','))
+        cell_restrictions[(row_id, col_id)] = (v[0], int(v[1::]))
+    return cell_restrictions
 
-        restrictions = {}
-        for root in table.roots:
-            supplier_id = root.supplier.line_id
-            consumer_id = root.consumer.line_id
-            price_matrix[supplier_id][consumer_id] = root.price
-            if root.capacity:
-                capacities[supplier_id][consumer_id] = root.capacity
 
-            restriction = root.restriction
-            if restriction:
-                restrictions[(supplier_id, consumer_id)] = (restriction[0], int(restriction[1:]))
+def get_matrix_columns(table: schemas.TransportTable) -> dict[str, Optional[bytes | dict[str, str]]]:
+    return {
+        'suppliers': pack_array(table.suppliers),
+        'consumers': pack_array(table.consumers),
+        'prices': pack_array(table.price_matrix),
+        'capacities': pack_array(table.capacities) if table.capacities else None,
+        'restrictions': table.restrictions or None,
+    }
 
-    return TransportTable(list(suppliers), list(consumers), price_matrix, restrictions, capacities)
+
+def get_matrix_table_info(matrix: models.TableMatrix) -> TransportTable:
+    capacities = unpack_array(matrix.capacities) if matrix.capacities is not None else None
+    return TransportTable(unpack_array(matrix.suppliers), unpack_array(matrix.consumers),
+                          unpack_array(matrix.prices), get_restrictions(matrix.restrictions), capacities)
 
 
 def get_transport_table_info_unauthorized(table: schemas.TransportTable) -> TransportTable:
-    restrictions = {}
-    if table.restrictions:
-        for k, v in table.restrictions.items():
-            row_id, col_id = map(int, k.split(','))
-            restrictions[(row_id, col_id)] = (v[0], int(v[1::]))
-    return TransportTable(table.suppliers, table.consumers, np.array(table.price_matrix, dtype=np.float16),
-                          restrictions, table.capacities)
+    return TransportTable(table.suppliers, table.consumers, table.price_matrix,
+                          get_restrictions(table.restrictions), table.capacities or None)
+
+
+def get_route_table_info_unauthorized(table: schemas.RouteTable) -> RouteTable:
+    routes = [(route.supplier_id, route.consumer_id, route.price, route.capacity) for route in table.routes]
+    return RouteTable(table.suppliers, table.consumers, routes)
+
+
+def get_cell_changes(changes: Optional[dict[str, float | int]]) -> dict[tuple[int, int], float | int]:
+    cell_changes = {}
+    for k, v in (changes or {}).items():
+        row_id, col_id = map(int, k.split(','))
+        cell_changes[(row_id, col_id)] = v
+    return cell_changes
 
 
 def get_root_info(roots: set[SolutionRoot]) -> list[dict[str, int | float]]:
@@ -60,6 +129,25 @@ def get_root_info(roots: set[SolutionRoot]) -> list[dict[str, int | float]]:
     return transition_roots
 
 
+def bulk_insert(session: Session, model: Type[models.Base], rows: list[dict[str, Any]]) -> None:
+    if not rows:
+        return
+    connection = session.connection()
+    if connection.dialect.name != 'postgresql' or connection.dialect.driver != 'psycopg2':
+        connection.execute(insert(model.__table__), rows)
+        return
+
+    # Для PostgreSQL строки передаются одним COPY: пустое поле CSV без кавычек читается как NULL
+    columns = list(rows[0])
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(['' if row[column] is None else row[column] for column in columns])
+    buffer.seek(0)
+    with connection.connection.dbapi_connection.cursor() as cursor:
+        cursor.copy_expert(f'COPY {model.__tablename__} ({", ".join(columns)}) FROM STDIN WITH (FORMAT csv)', buffer)
+
+
 def get_password_hash(password: str) -> str:
     password_bytes = password.encode('UTF-8')
     return hashlib.sha256(password_bytes).hexdigest()
@@ -0,0 +1,271 @@
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, AsyncIterator, Callable, Optional
+from fastapi import Request
+from fastapi.concurrency import run_in_threadpool
+from backend import cache, schemas, services, utils
+from backend.database import SessionLocal, engine
+from backend.transportation_lib.route_table import RouteTable
+from backend.transportation_lib.transport_errors import VALIDATION_ERRORS, SolveInterrupted
+from backend.transportation_lib.transport_table import TransportTable
+
+
+BATCH_WORKERS = int(os.getenv('BATCH_WORKERS', '0')) or os.cpu_count() or 1
+# Решения по запросам идут в отдельный пул, чтобы пакетные задачи и задачи очереди их не вытесняли
+SOLVE_WORKERS = int(os.getenv('SOLVE_WORKERS', '0')) or os.cpu_count() or 1
+SOLVE_CONCURRENCY = int(os.getenv('SOLVE_CONCURRENCY', '0')) or SOLVE_WORKERS
+SOLVE_TIMEOUT = float(os.getenv('SOLVE_TIMEOUT', '60'))
+# Период проверки готовности решения, истечения срока и разрыва соединения клиентом
+SOLVE_POLL_INTERVAL = 0.05
+
+executor: Optional[ProcessPoolExecutor] = None
+jobs: dict[int, Future] = {}
+# Каждый процесс пакетного пула получает свое место: номер решаемой задачи и номер задачи, отмененной на нем,
+# в общей памяти. Отмена адресована конкретной задаче и не задевает следующую, начатую на том же месте
+worker_idx = 0
+running_jobs = multiprocessing.RawArray('i', BATCH_WORKERS)
+job_cancel_flags = multiprocessing.RawArray('i', BATCH_WORKERS)
+
+solve_executor: Optional[ProcessPoolExecutor] = None
+solve_slots: Optional[asyncio.Queue[int]] = None
+# Флаг отмены на каждое место пула: процесс-решатель читает его из общей памяти на каждой итерации
+cancel_flags = multiprocessing.RawArray('b', SOLVE_CONCURRENCY)
+
+
+class SolverBusy(Exception):
+    def __init__(self, timeout: float) -> None:
+        self.__timeout = timeout
+
+    def __str__(self) -> str:
+        return f'Все решатели заняты, место не освободилось за {self.__timeout} с'
+
+
+class ClientDisconnected(Exception):
+    def __str__(self) -> str:
+        return 'Клиент отключился, решение снято'
+
+
+class SolveError(ValueError):
+    # Ошибка проверки данных из процесса-решателя: исключения библиотеки не восстанавливаются при передаче
+    # между процессами, поэтому передается их текст
+    def __init__(self, message: str) -> None:
+        super().__init__(message)
+        self.__message = message
+
+    def __str__(self) -> str:
+        return self.__message
+
+
+class SolveTimeout(Exception):
+    def __init__(self, timeout: float) -> None:
+        self.__timeout = timeout
+
+    def __str__(self) -> str:
+        return f'Решение не уложилось в {self.__timeout} с'
+
+
+def get_executor() -> ProcessPoolExecutor:
+    global executor
+    if executor is None:
+        running_jobs[:] = [0] * BATCH_WORKERS
+        executor = ProcessPoolExecutor(max_workers=BATCH_WORKERS, initializer=init_worker,
+                                       initargs=(multiprocessing.Value('i', 0), running_jobs, job_cancel_flags))
+    return executor
+
+
+def get_solve_executor() -> ProcessPoolExecutor:
+    global solve_executor
+    if solve_executor is None:
+        solve_executor = ProcessPoolExecutor(max_workers=SOLVE_WORKERS, initializer=init_solve_worker,
+                                             initargs=(cancel_flags,))
+    return solve_executor
+
+
+def get_solve_slots() -> asyncio.Queue[int]:
+    global solve_slots
+    if solve_slots is None:
+        solve_slots = asyncio.Queue()
+        for slot in range(SOLVE_CONCURRENCY):
+            solve_slots.put_nowait(slot)
+    return solve_slots
+
+
+def shutdown_executor() -> None:
+    global executor, solve_executor, solve_slots
+    if executor is not None:
+        executor.shutdown(cancel_futures=True)
+        executor = None
+    if solve_executor is not None:
+        cancel_flags[:] = [1] * SOLVE_CONCURRENCY
+        solve_executor.shutdown(cancel_futures=True)
+        solve_executor = None
+    solve_slots = None
+
+
+def init_worker(counter: Any, job_ids: Any, flags: Any) -> None:
+    global worker_idx, running_jobs, job_cancel_flags
+    # Соединения пула, унаследованные от родителя, остаются ему, процесс открывает свои
+    engine.dispose(close=False)
+    with counter.get_lock():
+        worker_idx = counter.value
+        counter.value += 1
+    running_jobs, job_cancel_flags = job_ids, flags
+
+
+def init_solve_worker(flags: Any) -> None:
+    # Общий массив передается при создании процесса: так он доступен при любом способе запуска процессов
+    global cancel_flags
+    cancel_flags = flags
+
+
+def run_solve(slot: int, deadline: float, solve: Callable[..., schemas.Solution], t: TransportTable | RouteTable,
+              *args: Any) -> tuple[Optional[schemas.Solution], Optional[dict[str, dict[str, float | int]]]]:
+    t.stop_condition = lambda: cancel_flags[slot] != 0 or time.time() > deadline
+    try:
+        solution = solve(t, *args)
+    except SolveInterrupted:
+        return None, None
+    except VALIDATION_ERRORS as error:
+        raise SolveError(str(error)) from None
+    except Exception as error:  # pylint: disable=broad-exception-caught
+        raise RuntimeError(str(error) or type(error).__name__) from None
+    return solution, t.stats
+
+
+async def acquire_slot(request: Request, deadline: float, timeout: float) -> int:
+    slots = get_solve_slots()
+    getter = asyncio.ensure_future(slots.get())
+    try:
+        while True:
+            done, _ = await asyncio.wait({getter}, timeout=SOLVE_POLL_INTERVAL)
+            if done:
+                return getter.result()
+            if await request.is_disconnected():
+                raise ClientDisconnected()
+            if time.time() >= deadline:
+                raise SolverBusy(timeout)
+    except BaseException:
+        # Место, выданное одновременно с отказом от ожидания, возвращается в очередь
+        if not getter.cancel():
+            slots.put_nowait(getter.result())
+        raise
+
+
+async def solve_in_pool(request: Request, solve: Callable[..., schemas.Solution], t: TransportTable | RouteTable,
+                        *args: Any, timeout: Optional[float]=None
+                        ) -> tuple[schemas.Solution, Optional[dict[str, dict[str, float | int]]]]:
+    # Срок запроса не может превышать SOLVE_TIMEOUT и включает ожидание свободного места в пуле
+    timeout = min(timeout, SOLVE_TIMEOUT) if timeout else SOLVE_TIMEOUT
+    deadline = time.time() + timeout
+    slot = await acquire_slot(request, deadline, timeout)
+
+    loop = asyncio.get_running_loop()
+    slots = get_solve_slots()
+    cancel_flags[slot] = 0
+    future = get_solve_executor().submit(run_solve, slot, deadline, solve, t, *args)
+    # Место освобождается, только когда процесс действительно закончил работу, иначе новая задача сбросила бы флаг
+    future.add_done_callback(lambda _: loop.call_soon_threadsafe(slots.put_nowait, slot))
+    result = asyncio.wrap_future(future)
+    try:
+        while True:
+            done, _ = await asyncio.wait({result}, timeout=SOLVE_POLL_INTERVAL)
+            if done:
+                break
+            if await request.is_disconnected():
+                raise ClientDisconnected()
+            if time.time() >= deadline:
+                raise SolveTimeout(timeout)
+    except BaseException:
+        # Запущенная задача останавливается решателем по флагу, еще не начатая снимается из очереди пула
+        cancel_flags[slot] = 1
+        future.cancel()
+        raise
+
+    solution, stats = await result
+    if solution is None:
+        # Решатель сам заметил истечение срока раньше, чем очередная проверка здесь
+        raise SolveTimeout(timeout)
+    return solution, stats
+
+
+async def solve_cached(request: Request, key: str, solve: Callable[..., schemas.Solution], t: TransportTable,
+                       *args: Any, timeout: Optional[float]=None
+                       ) -> tuple[schemas.Solution, Optional[dict[str, dict[str, float | int]]]]:
+    # Постоянный уровень кэша обращается к базе синхронно, поэтому кэш вызывается из пула потоков
+    solution = await run_in_threadpool(cache.solutions.get, key)
+    if solution is not None:
+        return solution, t.stats
+    solution, stats = await solve_in_pool(request, solve, t, *args, timeout=timeout)
+    await run_in_threadpool(cache.solutions.put, key, solution)
+    return solution, stats
+
+
+def solve_table(index: int, table_id: Optional[int], table: schemas.TransportTable, mode: int,
+                pivot_rule: str='dantzig', block_size: Optional[int]=None) -> str:
+    # Исключения библиотеки не восстанавливаются при передаче между процессами, поэтому ошибка
+    # возвращается текстом в результате задачи
+    try:
+        t = utils.get_transport_table_info_unauthorized(table)
+        solution = services.get_optimal_solution(t, mode, pivot_rule, block_size)
+        result = schemas.BatchSolution(index=index, table_id=table_id, solution=solution)
+    except Exception as error:  # pylint: disable=broad-exception-caught
+        result = schemas.BatchSolution(index=index, table_id=table_id, error=str(error) or type(error).__name__)
+    return result.model_dump_json()
+
+
+async def stream_solutions(tables: list[tuple[Optional[int], Optional[schemas.TransportTable]]], mode: int,
+                           pivot_rule: str='dantzig', block_size: Optional[int]=None) -> AsyncIterator[str]:
+    loop = asyncio.get_running_loop()
+    pool = get_executor()
+    futures = []
+    for index, (table_id, table) in enumerate(tables):
+        if table is None:
+            yield schemas.BatchSolution(index=index, table_id=table_id,
+                                        error=f'Таблица {table_id} не найдена').model_dump_json() + '\n'
+            continue
+        futures.append(loop.run_in_executor(pool, solve_table, index, table_id, table, mode, pivot_rule,
+                                            block_size))
+
+    # Результаты отдаются по мере готовности, при разрыве соединения еще не начатые задачи снимаются
+    try:
+        for future in asyncio.as_completed(futures):
+            yield await future + '\n'
+    finally:
+        for future in futures:
+            future.cancel()
+
+
+def run_job(job_id: int) -> None:
+    # Флаг сбрасывается до публикации номера задачи, чтобы не потерять отмену, пришедшую сразу после нее
+    job_cancel_flags[worker_idx] = 0
+    running_jobs[worker_idx] = job_id
+    try:
+        services.run_job(SessionLocal(), job_id, lambda: job_cancel_flags[worker_idx] == job_id)
+    finally:
+        running_jobs[worker_idx] = 0
+
+
+def submit_job(job_id: int) -> None:
+    future = get_executor().submit(run_job, job_id)
+    jobs[job_id] = future
+    future.add_done_callback(lambda _: jobs.pop(job_id, None))
+
+
+def cancel_job(job_id: int) -> None:
+    # Еще не начатая задача снимается из очереди пула, запущенная останавливается решателем по флагу
+    future = jobs.get(job_id)
+    if future is not None:
+        future.cancel()
+    # Между проверкой и записью место могло перейти к другой задаче: флаг хранит номер отменяемой задачи,
+    # поэтому новая его не примет
+    for idx, running_job in enumerate(running_jobs):
+        if running_job == job_id:
+            job_cancel_flags[idx] = job_id
+
+
+def resume_jobs() -> None:
+    for job_id in services.get_unfinished_jobs(SessionLocal()):
+        submit_job(job_id)